@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+
+import pygame
+
+from game_state import MARIO_SIZE
+from render import BG_WIDTH, BG_HEIGHT
+
+MUSIC_FOLDER = "music/"
+SOUNDS_FOLDER = "sounds/"
+SPRITES_FOLDER = "sprites/"
+
+STAR_SIZE = 16
+
+# --- Manifest ---
+# name: (kind, path, fallback size). "sprite" images keep their alpha
+# (convert_alpha), "image" ones are opaque (convert). A missing image is
+# replaced by a blank surface of the fallback size; a missing sound is None
+# and simply never plays. Only the game front-end loads these: headless
+# tools (GameState, env, workers) never import this module.
+MANIFEST = {
+    "mario": ("sprite", SPRITES_FOLDER + "mario.png", (MARIO_SIZE, MARIO_SIZE)),
+    "star": ("sprite", SPRITES_FOLDER + "star.png", (STAR_SIZE, STAR_SIZE)),
+    "pipe": ("sprite", SPRITES_FOLDER + "pipe.png", (20, 20)),
+    "piranha": ("sprite", SPRITES_FOLDER + "piranha.png", (20, 20)),
+    "bg": ("image", SPRITES_FOLDER + "bg.png", (BG_WIDTH, BG_HEIGHT)),
+    "music": ("music", MUSIC_FOLDER + "slides.wav", None),  # Plays whole time
+    "scream": ("sound", SOUNDS_FOLDER + "scream.wav", None),  # plays on death
+    "win": ("sound", SOUNDS_FOLDER + "win.wav", None),
+    "mario_haha": ("sound", SOUNDS_FOLDER + "mario_haha.wav", None),  # plays on win
+    "draw": ("sound", SOUNDS_FOLDER + "line_drawing.mp3", None),
+    "snap": ("sound", SOUNDS_FOLDER + "line_snap.wav", None),
+    "pop": ("sound", SOUNDS_FOLDER + "mario_switch.wav", None),
+    "speedup": ("sound", SOUNDS_FOLDER + "mario_switch.wav", None),  # figure out how to play at higher pitch with higher speed
+    "error": ("sound", SOUNDS_FOLDER + "error.wav", None),
+}
+
+STARTUP_BUDGET_MS = 500  # Boot to first frame; the report flags anything slower
+
+
+class AssetManager:
+    """
+    Loads the MANIFEST assets on first use.
+
+    prefetch() decodes files on a background thread so they are ready
+    before they are needed; image() converts a surface to the display
+    format once, on the main thread, the first time it is asked for after
+    the display is set. Files shared by several names are decoded once.
+    Music is loaded once and only restarted after that. mark() and
+    report() time the way to the first frame.
+    """
+
+    def __init__(self, manifest=MANIFEST, start=None):
+        self.manifest = manifest
+        self.start = start if start is not None else time.perf_counter()  # perf_counter() that marks count from
+        self.marks = []
+        self.load_ms = {}  # path -> ms spent decoding it
+        self.missing = []
+        self._raw = {}  # path -> decoded Surface / Sound (None if missing or unplayable)
+        self._images = {}  # name -> display-format Surface
+        self._loading = {}  # path -> Event set once another thread has decoded it
+        self._lock = threading.Lock()
+        self._prefetch = None
+        self._music = None  # Path of the loaded music
+
+    # --- Timing ---
+    def mark(self, label):
+        self.marks.append((label, (time.perf_counter() - self.start) * 1000))
+
+    def report(self, budget_ms=STARTUP_BUDGET_MS):
+        """Startup lines: each mark, decode times and missing files."""
+        lines = []
+        last = 0.0
+        for label, ms in self.marks:
+            lines.append(f"{label:<16}{ms - last:>8.1f} ms")
+            last = ms
+        total = self.marks[-1][1] if self.marks else 0.0
+        verdict = "over budget" if total > budget_ms else "ok"
+        lines.append(f"{'startup':<16}{total:>8.1f} ms ({verdict}, budget {budget_ms} ms)")
+        with self._lock:
+            decoded = sorted(self.load_ms.items(), key=lambda item: -item[1])
+            missing = list(self.missing)
+        lines.append(f"decoded {len(decoded)} files in {sum(ms for _, ms in decoded):.1f} ms"
+                     + (f", slowest {decoded[0][0]} ({decoded[0][1]:.1f} ms)" if decoded else ""))
+        for path in missing:
+            lines.append(f"missing {path}, using the fallback")
+        return lines
+
+    # --- Loading ---
+    def _decode(self, name):
+        kind, path, size = self.manifest[name]
+        with self._lock:
+            if path in self._raw:
+                return self._raw[path]
+            loading = self._loading.get(path)
+            if loading is None:
+                self._loading[path] = threading.Event()
+        if loading is not None:
+            # Already being decoded (e.g. by prefetch): wait rather than decode it twice
+            loading.wait()
+            return self._raw[path]
+        start = time.perf_counter()
+        asset = None
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            if kind == "sound":
+                asset = pygame.mixer.Sound(path) if pygame.mixer.get_init() else None
+            elif kind != "music":
+                asset = pygame.image.load(path)
+        except FileNotFoundError:
+            with self._lock:
+                if path not in self.missing:
+                    self.missing.append(path)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+        with self._lock:
+            self.load_ms[path] = (time.perf_counter() - start) * 1000
+            self._raw[path] = asset
+        self._loading[path].set()
+        return asset
+
+    def prefetch(self, names=None):
+        """Decode names (default: every image and sound) on a background thread."""
+        names = [name for name in (names or self.manifest) if self.manifest[name][0] != "music"]
+        self._prefetch = threading.Thread(target=lambda: [self._decode(name) for name in names], daemon=True)
+        self._prefetch.start()
+
+    def image(self, name):
+        """The Surface for name, in the display format once a display mode is set."""
+        surface = self._images.get(name)
+        if surface is None:
+            kind, _, size = self.manifest[name]
+            surface = self._decode(name)
+            if surface is None:
+                surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha() if kind == "sprite" else surface.convert()
+                self._images[name] = surface
+        return surface
+
+    def sound(self, name):
+        """The Sound for name, or None if it is missing or there is no audio."""
+        return self._decode(name)
+
+    def play_music(self, name="music"):
+        """Start the music from the top, loading the file only the first time."""
+        path = self.manifest[name][1]
+        if not pygame.mixer.get_init() or not os.path.exists(path):
+            return
+        try:
+            if self._music != path:
+                start = time.perf_counter()
+                pygame.mixer.music.load(path)
+                self.load_ms[path] = (time.perf_counter() - start) * 1000
+                self._music = path
+            pygame.mixer.music.play(-1)
+        except Exception as e:
+            print(f"Error playing {path}: {e}")
@@ -0,0 +1,180 @@
+import numpy as np
+
+from game_state import (
+    LINE_COUNT, MARIO_SIZE, MARIO_SPEED_DEFAULT, PIPE_Y, make_lines_x,
+)
+from web_index import segments_intersect
+
+# Board results
+RUNNING = 0
+WON = 1
+DIED = -1
+
+
+class BatchSim:
+    """
+    N independent rounds advanced together with the GameState rules.
+
+    State is kept as structure-of-arrays NumPy buffers, one row per board:
+    mario_x/mario_y, the slide target, a padded (N, max_webs) web table and
+    a used-web mask. Each board plays a single round; once it wins or dies
+    its row is frozen and result/frames hold the outcome.
+    """
+
+    def __init__(self, n, max_webs, line_count=LINE_COUNT):
+        self.n = n
+        self.max_webs = max_webs
+        self.lines_x = np.array(make_lines_x(line_count), dtype=np.float64)
+        # --- Mario ---
+        self.mario_x = np.zeros(n)
+        self.mario_y = np.zeros(n)
+        self.sliding = np.zeros(n, dtype=bool)
+        self.target_x = np.zeros(n)
+        self.target_y = np.zeros(n)
+        self.speed = np.full(n, MARIO_SPEED_DEFAULT)
+        self.star_idx = np.zeros(n, dtype=np.int64)
+        # --- Webs (padded) ---
+        self.x1 = np.zeros((n, max_webs))
+        self.y1 = np.zeros((n, max_webs))
+        self.x2 = np.zeros((n, max_webs))
+        self.y2 = np.zeros((n, max_webs))
+        self.web_count = np.zeros(n, dtype=np.int64)
+        self.valid = np.zeros((n, max_webs), dtype=bool)
+        # Webs with the same endpoints share one used flag, like GameState's web_id set
+        self.web_group = np.tile(np.arange(max_webs), (n, 1))
+        self.used = np.zeros((n, max_webs), dtype=bool)
+        # --- Outcome ---
+        self.result = np.zeros(n, dtype=np.int8)
+        self.frames = np.zeros(n, dtype=np.int64)
+        self._rows = np.arange(n)
+
+    # --- Setup ---
+    def load_board(self, i, webs, start_idx, star_idx, speed=MARIO_SPEED_DEFAULT):
+        """
+        Reset board i to a fresh round with the given webs and 0-based
+        start/star VLINEs. webs may be a web list or an (n, 4) array such as
+        a MapPack entry.
+        """
+        webs = np.asarray(webs).reshape(-1, 4)
+        if len(webs) > self.max_webs:
+            raise ValueError(f"board {i} has {len(webs)} webs, max_webs is {self.max_webs}")
+        self.mario_x[i] = self.lines_x[start_idx] - MARIO_SIZE // 2
+        self.mario_y[i] = 0
+        self.sliding[i] = False
+        self.speed[i] = speed
+        self.star_idx[i] = star_idx
+        self.result[i] = RUNNING
+        self.frames[i] = 0
+        self.used[i] = False
+        self.valid[i] = False
+        self.web_count[i] = 0
+        self.web_group[i] = np.arange(self.max_webs)
+        for x1, y1, x2, y2 in webs.tolist():
+            self._append_web(i, (x1, y1), (x2, y2))
+
+    def add_web(self, i, start_point, end_point):
+        """Place a web on board i if it does not cross an existing one (mirrors GameState.place_web)."""
+        count = self.web_count[i]
+        for w in range(count):
+            existing = ((self.x1[i, w], self.y1[i, w]), (self.x2[i, w], self.y2[i, w]))
+            if segments_intersect(start_point, end_point, existing[0], existing[1]):
+                return False
+        if count >= self.max_webs:
+            return False
+        self._append_web(i, start_point, end_point)
+        return True
+
+    def _append_web(self, i, start, end):
+        w = self.web_count[i]
+        (x1, y1), (x2, y2) = start, end
+        same = self.valid[i] & (
+            ((self.x1[i] == x1) & (self.y1[i] == y1) & (self.x2[i] == x2) & (self.y2[i] == y2))
+            | ((self.x1[i] == x2) & (self.y1[i] == y2) & (self.x2[i] == x1) & (self.y2[i] == y1))
+        )
+        self.x1[i, w], self.y1[i, w], self.x2[i, w], self.y2[i, w] = x1, y1, x2, y2
+        self.valid[i, w] = True
+        self.web_group[i, w] = self.web_group[i, same.argmax()] if same.any() else w
+        self.web_count[i] = w + 1
+
+    # --- Simulation ---
+    def step(self):
+        """Advance every running board by one frame."""
+        active = self.result == RUNNING
+        if not active.any():
+            return
+        self.frames[active] += 1
+        half = MARIO_SIZE // 2
+        cx = self.mario_x + half
+        cy = self.mario_y + half
+
+        on_line = (np.abs(cx[:, None] - self.lines_x[None, :]) < 5).any(axis=1)
+
+        # --- Next web below Mario on his VLINE ---
+        cxw = cx[:, None]
+        cyw = cy[:, None]
+        x1, y1, x2, y2 = self.x1, self.y1, self.x2, self.y2
+        spans = self.valid & on_line[:, None] & (np.minimum(x1, x2) <= cxw) & (cxw <= np.maximum(x1, x2))
+        dx = x2 - x1
+        dy = y2 - y1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y_at = np.where(dx != 0, y1 + ((cxw - x1) / dx) * dy, y1)
+        below = spans & (y_at > cyw)
+        web_below = below.any(axis=1)
+
+        self.used[active & (self.mario_y <= 0)] = False
+
+        # --- Sliding boards ---
+        sliding = active & self.sliding
+        sdx = self.target_x - self.mario_x
+        sdy = self.target_y - self.mario_y
+        sdist = np.hypot(sdx, sdy)
+        arrive = sliding & (sdist <= self.speed)
+        move = sliding & ~arrive
+        self.mario_x[arrive] = self.target_x[arrive]
+        self.mario_y[arrive] = self.target_y[arrive]
+        self.sliding[arrive] = False
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.mario_x[move] += self.speed[move] * (sdx[move] / sdist[move])
+            self.mario_y[move] += self.speed[move] * (sdy[move] / sdist[move])
+
+        # --- Hop detection for falling boards ---
+        # A web below Mario already rules out ABOUT_TO_DIE and ABOUT_TO_WIN
+        falling = active & ~sliding
+        can_hop = falling & web_below
+        near_x = (np.minimum(x1, x2) - 1 <= cxw) & (cxw <= np.maximum(x1, x2) + 1)
+        length2 = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(((cxw - x1) * dx + (cyw - y1) * dy) / length2, 0, 1)
+        distance = np.hypot(cxw - (x1 + t * dx), cyw - (y1 + t * dy))
+        used = np.take_along_axis(self.used, self.web_group, axis=1)
+        touch = (
+            can_hop[:, None] & self.valid & near_x & (length2 != 0)
+            & (distance < self.speed[:, None] + MARIO_SIZE / 4) & ~used
+        )
+        hopped = touch.any(axis=1)
+        rows = self._rows[hopped]
+        first = touch[hopped].argmax(axis=1)
+        hx1, hy1, hx2, hy2 = x1[rows, first], y1[rows, first], x2[rows, first], y2[rows, first]
+        hcx, hcy = cx[rows], cy[rows]
+        # Always slide to the endpoint that is NOT closest to Mario's current position
+        to_end = np.hypot(hcx - hx1, hcy - hy1) < np.hypot(hcx - hx2, hcy - hy2)
+        self.target_x[rows] = np.where(to_end, hx2, hx1) - half
+        self.target_y[rows] = np.where(to_end, hy2, hy1) - half
+        self.sliding[rows] = True
+        self.used[rows, self.web_group[rows, first]] = True
+        fall = falling & ~hopped
+        self.mario_y[fall] += self.speed[fall]
+
+        # --- Win / death once Mario reaches the pipes ---
+        at_pipes = active & (self.mario_y + MARIO_SIZE >= PIPE_Y)
+        over_star = np.abs(cx - self.lines_x[self.star_idx]) < 5
+        self.result[at_pipes & over_star & (PIPE_Y - self.mario_y < 5)] = WON
+        self.result[at_pipes & ~over_star] = DIED
+
+    def run(self, max_frames=100000):
+        """Step until every board has finished or max_frames is reached; returns result."""
+        for _ in range(max_frames):
+            if not (self.result == RUNNING).any():
+                break
+            self.step()
+        return self.result
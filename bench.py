@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from game_state import GameState, MARIO_SIZE, MAX_PATH_LENGTH, PIPE_Y, SNAP_Y
+
+# --- Sweep ---
+WEB_COUNTS = [10, 100, 1000, 10000]
+LINE_COUNTS = [4, 8, 16, 32, 64]
+CASES = ["step", "scan", "place", "render", "render_dirty"]
+
+BENCH_OUT = "bench_results.json"
+BENCH_BASELINE = "bench_baseline.json"
+TOLERANCE = 0.25  # A case is a regression when it gets this much slower than the baseline
+MIN_TIME = 0.2  # Seconds each repeat of a case runs for
+REPEATS = 3
+
+
+def make_board(web_count, line_count, seed=0):
+    """
+    web_count random webs between adjacent VLINEs, snapped like drawn ones.
+
+    Overlaps are allowed (placing 10k webs through the overlap check would
+    take longer than the benchmark); webs stay above y=PIPE_Y - 40 so the
+    placement probe below them never hits one.
+    """
+    rng = random.Random(seed)
+    state = GameState(seed=seed, line_count=line_count)
+    webs = []
+    for _ in range(web_count):
+        gap = rng.randrange(line_count - 1)
+        y1 = rng.randrange(0, PIPE_Y - 40 - MAX_PATH_LENGTH, SNAP_Y)
+        y2 = y1 + rng.randrange(0, MAX_PATH_LENGTH + 1, SNAP_Y)
+        if rng.random() < 0.5:
+            y1, y2 = y2, y1
+        webs.append(((state.lines_x[gap], y1), (state.lines_x[gap + 1], y2)))
+    state.set_webs(webs)
+    return state
+
+
+def measure(op, min_time=MIN_TIME, repeats=REPEATS):
+    """Best-of-repeats seconds per call of op(), calling it in batches until min_time passes."""
+    best = None
+    for _ in range(repeats):
+        calls = 0
+        batch = 1
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                op()
+            calls += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            batch *= 2
+        per_call = elapsed / calls
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def play_frame(state, board):
+    """
+    state.step(), but every round is played on the same board: a win would
+    otherwise clear the webs (or load a ladder map), so wins are undone
+    and the list is refilled in place, which keeps the WebIndex valid.
+    """
+    state.step()
+    if state.game_over:
+        state.reset_game(keep_webs=True)
+    if state.wonGames:
+        state.wonGames = 0
+        state.webs[:] = board
+
+
+# --- Cases ---
+def bench_step(state):
+    """A whole GameState.step (features, hop search, movement), restarting each round."""
+    board = list(state.webs)
+    return lambda: play_frame(state, board)
+
+
+def bench_scan(state):
+    """Just the ABOUT_TO_DIE / DIST_NEXT_WEB and hop scans, at positions Mario actually visits."""
+    probe = GameState(seed=1, line_count=state.line_count)
+    probe.set_webs(state.webs)
+    board = list(state.webs)
+    positions = []
+    while len(positions) < 2000:
+        positions.append((probe.mario_x + MARIO_SIZE // 2, probe.mario_y + MARIO_SIZE // 2, probe.MARIO_SPEED))
+        play_frame(probe, board)
+    index = state.get_web_index()
+    used = 0
+    it = iter(())
+
+    def op():
+        nonlocal it
+        try:
+            cx, cy, speed = next(it)
+        except StopIteration:
+            it = iter(positions)
+            cx, cy, speed = next(it)
+        index.next_web_dist(cx, cy)
+        index.find_hop(cx, cy, speed + MARIO_SIZE / 4, used)
+    return op
+
+
+def bench_place(state):
+    """The place_web overlap check for a web that fits, so no candidate stops it early."""
+    start = (state.lines_x[0], PIPE_Y - 10)
+    end = (state.lines_x[1], PIPE_Y - 10)
+    index = state.get_web_index()
+
+    def op():
+        index.crossing(start, end)
+    return op
+
+
+def bench_render(state, full=True):
+    """
+    One frame through Renderer with the SDL dummy video driver: a full-window
+    redraw that rebuilds the static layer, or (full=False) the usual
+    dirty-rect frame.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from render import Renderer, BG_WIDTH, BG_HEIGHT
+    from game_state import WINDOW_WIDTH, WINDOW_HEIGHT
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    renderer = Renderer(screen, pygame.Surface((MARIO_SIZE, MARIO_SIZE)), pygame.Surface((16, 16)),
+                        pygame.Surface((20, 20)), pygame.Surface((BG_WIDTH, BG_HEIGHT)))
+    board = list(state.webs)
+
+    def op():
+        play_frame(state, board)
+        if full:
+            renderer.static_key = None
+        renderer.draw(state)
+    return op
+
+
+BENCHES = {
+    "step": bench_step,
+    "scan": bench_scan,
+    "place": bench_place,
+    "render": bench_render,
+    "render_dirty": lambda state: bench_render(state, full=False),
+}
+
+
+def run(cases=CASES, web_counts=WEB_COUNTS, line_counts=LINE_COUNTS, min_time=MIN_TIME):
+    """Run every case over the sweep. Returns {"case/webs=N/lines=M": microseconds per call}."""
+    results = {}
+    for line_count in line_counts:
+        for web_count in web_counts:
+            for case in cases:
+                state = make_board(web_count, line_count)
+                key = f"{case}/webs={web_count}/lines={line_count}"
+                results[key] = round(measure(BENCHES[case](state), min_time) * 1e6, 3)
+                print(f"{key:<32} {results[key]:>12.3f} us", flush=True)
+    return results
+
+
+def machine_info():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if "pygame" in sys.modules:
+        info["pygame"] = sys.modules["pygame"].version.ver
+    return info
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Print how each case moved against the baseline. Returns the keys that regressed."""
+    regressions = []
+    for key, now in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        ratio = now / before
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"{key:<32} {before:>12.3f} -> {now:>12.3f} us  x{ratio:.2f}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the simulation, placement check and renderer over a sweep of board sizes.")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--webs", nargs="+", type=int, default=WEB_COUNTS)
+    parser.add_argument("--lines", nargs="+", type=int, default=LINE_COUNTS)
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds per repeat of each case")
+    parser.add_argument("--out", default=BENCH_OUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=BENCH_BASELINE, help="results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.cases, args.webs, args.lines, args.min_time)
+    report = {"machine": machine_info(), "min_time": args.min_time, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} case(s) more than {args.tolerance:.0%} slower than {args.baseline}")
+            sys.exit(1)
@@ -0,0 +1,141 @@
+import random
+
+import numpy as np
+
+from game_state import GameState, LINE_COUNT
+
+# --- Observation layout ---
+# The debug panel's NEAT inputs, one float32 each:
+#   [VLINE_1 .. VLINE_n, VLINE_STAR, onWeb, DIST_NEXT_WEB, VLINE_PERCENTAGE, ABOUT_TO_DIE, ABOUT_TO_WIN]
+# Values are the raw panel numbers (VLINE_STAR is 1-based, DIST_NEXT_WEB is
+# pixels or -1); scale them in the network if needed.
+VLINE_STAR_OBS = 0
+ON_WEB_OBS = 1
+DIST_NEXT_WEB_OBS = 2
+VLINE_PERCENTAGE_OBS = 3
+ABOUT_TO_DIE_OBS = 4
+ABOUT_TO_WIN_OBS = 5
+SCALAR_OBS = 6
+
+WIN_REWARD = 1.0
+DEATH_REWARD = -1.0
+MAX_TICKS = 60 * 60 * 10  # An episode is cut off after 10 minutes of game time
+
+
+def obs_size(line_count=LINE_COUNT):
+    return line_count + SCALAR_OBS
+
+
+class MarioSlidesEnv:
+    """
+    Gym-style wrapper around GameState: reset() / step(action).
+
+    Observations are written into obs, a float32 array of obs_size(line_count)
+    owned by the caller (one is allocated if not given). reset() and step()
+    return that same array, so keep a copy if you need an older frame.
+
+    An action is None for no input, or (gap, y_left, y_right): a web from
+    VLINE gap (0-based) to VLINE gap + 1, placed with the usual snapping,
+    length limit and overlap rules. A negative gap is also no input, so a
+    whole batch of actions fits in one int array. An episode ends when Mario
+    dies or after max_ticks; wins reset the round inside GameState as usual.
+    """
+
+    def __init__(self, seed=None, line_count=LINE_COUNT, max_ticks=MAX_TICKS, obs=None):
+        self.line_count = line_count
+        self.max_ticks = max_ticks
+        self.rng = random.Random(seed)
+        if obs is None:
+            obs = np.zeros(obs_size(line_count), dtype=np.float32)
+        if obs.shape != (obs_size(line_count),) or obs.dtype != np.float32:
+            raise ValueError(f"obs must be a float32 array of shape ({obs_size(line_count)},)")
+        self.obs = obs
+        self._scalars = obs[line_count:]
+        self.state = None
+        self._vline_idx = None
+        self.info = {"events": [], "wonGames": 0, "TOTAL_TIME_TO_WIN": 0.0}
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        self.state = GameState(seed=self.rng.getrandbits(64), line_count=self.line_count)
+        self.obs.fill(0)
+        self._vline_idx = None
+        self._write_obs()
+        return self.obs
+
+    def step(self, action=None):
+        """Returns (obs, reward, done, info); info is reused between calls."""
+        state = self.state
+        actions = ()
+        if action is not None and 0 <= action[0] < self.line_count - 1:
+            x1, x2 = state.lines_x[int(action[0])], state.lines_x[int(action[0]) + 1]
+            actions = [("web", state.snap_to_line(x1, action[1]), state.snap_to_line(x2, action[2]))]
+        events = state.step(actions)
+        reward = 0.0
+        for event in events:
+            if event == "win":
+                reward += WIN_REWARD
+            elif event == "death":
+                reward += DEATH_REWARD
+        self._write_obs()
+        info = self.info
+        info["events"] = events
+        info["wonGames"] = state.wonGames
+        info["TOTAL_TIME_TO_WIN"] = state.TOTAL_TIME_TO_WIN
+        return self.obs, reward, state.game_over or state.ticks >= self.max_ticks, info
+
+    def _write_obs(self):
+        state = self.state
+        # Only the two VLINE slots that changed are touched, like GameState.VLINE_STATE
+        if state.vline_idx != self._vline_idx:
+            if self._vline_idx is not None:
+                self.obs[self._vline_idx] = 0
+            if state.vline_idx is not None:
+                self.obs[state.vline_idx] = 1
+            self._vline_idx = state.vline_idx
+        scalars = self._scalars
+        scalars[VLINE_STAR_OBS] = state.VLINE_STAR
+        scalars[ON_WEB_OBS] = state.mario_sliding
+        scalars[DIST_NEXT_WEB_OBS] = state.DIST_NEXT_WEB
+        scalars[VLINE_PERCENTAGE_OBS] = state.VLINE_PERCENTAGE
+        scalars[ABOUT_TO_DIE_OBS] = state.ABOUT_TO_DIE
+        scalars[ABOUT_TO_WIN_OBS] = state.ABOUT_TO_WIN
+
+
+class VecEnv:
+    """
+    N MarioSlidesEnvs writing into the rows of one (n, obs_size) float32
+    buffer. step() takes an (n, 3) array (or list) of actions and returns
+    (obs, rewards, dones, infos) using buffers allocated once. An env that
+    finishes is reset straight away, so its row already holds the first
+    observation of the next episode; dones marks which ones did.
+    """
+
+    def __init__(self, n, seed=None, line_count=LINE_COUNT, max_ticks=MAX_TICKS, obs=None):
+        if obs is None:
+            obs = np.zeros((n, obs_size(line_count)), dtype=np.float32)
+        if obs.shape != (n, obs_size(line_count)) or obs.dtype != np.float32:
+            raise ValueError(f"obs must be a float32 array of shape ({n}, {obs_size(line_count)})")
+        self.obs = obs
+        self.envs = [
+            MarioSlidesEnv(None if seed is None else seed + i, line_count, max_ticks, obs[i])
+            for i in range(n)
+        ]
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.dones = np.zeros(n, dtype=bool)
+        self.infos = [env.info for env in self.envs]
+
+    def reset(self):
+        for env in self.envs:
+            env.reset()
+        return self.obs
+
+    def step(self, actions=None):
+        for i, env in enumerate(self.envs):
+            _, reward, done, _ = env.step(None if actions is None else actions[i])
+            self.rewards[i] = reward
+            self.dones[i] = done
+            if done:
+                env.reset()
+        return self.obs, self.rewards, self.dones, self.infos
@@ -0,0 +1,411 @@
+import math
+import random
+import json
+from bisect import bisect_right
+from operator import attrgetter
+
+from web_index import WebIndex
+
+# --- Rules ---
+# Shared by the pygame front-end (main.py) and every headless tool, so this
+# module must never import pygame or touch audio, display or the wall clock.
+WINDOW_WIDTH = 800
+WINDOW_HEIGHT = 600
+FPS = 60
+
+LINE_COUNT = 4
+LINE_SPACING = 80
+
+MARIO_SIZE = 32
+MARIO_SPEED_DEFAULT = 1.1
+MARIO_SPEED_3 = MARIO_SPEED_DEFAULT * 1.5
+MARIO_SPEED_FAST = MARIO_SPEED_DEFAULT * 4.2
+
+PIPE_Y = WINDOW_HEIGHT - 40
+PIPE_MARGIN = WINDOW_HEIGHT - PIPE_Y  # Pipes sit this far above the bottom of any board
+MAX_PATH_LENGTH = WINDOW_HEIGHT // 10
+SNAP_DISTANCE = 15  # How close (px) a click must be to a VLINE to snap to it
+SNAP_Y = 10
+
+# Round progression (maps, speed, star VLINEs) comes from a levels.LevelPack
+_levels = None
+
+
+def make_lines_x(line_count=LINE_COUNT):
+    return [LINE_SPACING * (i + 1) for i in range(line_count)]
+
+
+def read_web_map(filename):
+    """Parse a map saved by save_web_map into a list of (start, end) tuples."""
+    with open(filename, "r") as f:
+        web_list = json.load(f)
+    return [(tuple(start), tuple(end)) for start, end in web_list]
+
+
+def default_levels():
+    """The LevelPack shared by every GameState not given one: ladder.json if present, else the default ladder."""
+    global _levels
+    if _levels is None:
+        from levels import LADDER_FILE, LevelPack  # levels imports this module
+
+        try:
+            _levels = LevelPack.from_file(LADDER_FILE)
+        except FileNotFoundError:
+            _levels = LevelPack()
+    return _levels
+
+
+# --- Snapshots ---
+# Everything GameState.snapshot() saves, in order. webs, web_index and rng
+# are saved by reference and copied on write; vline_idx goes last because
+# restore() rebuilds VLINE_STATE from it.
+SNAPSHOT_FIELDS = (
+    "webs", "web_index", "rng", "used_mask", "wonGames", "TOTAL_TIME_TO_WIN", "MARIO_SPEED",
+    "VLINE_PERCENTAGE", "ABOUT_TO_DIE", "ABOUT_TO_WIN", "DIST_NEXT_WEB", "ticks", "rounds", "round_seed",
+    "VLINE_STAR", "STAR_IDX", "mario_x", "mario_y", "mario_sliding", "slide_target", "fall_from_y",
+    "game_over", "frame", "start_time", "SEC_ALIVE", "TIME_TO_WIN", "vline_idx",
+)
+_get_snapshot = attrgetter(*SNAPSHOT_FIELDS)
+
+
+def write_web_map(webs, filename):
+    # Save as a list of [[x1, y1], [x2, y2]] for each web
+    web_list = [[list(start), list(end)] for start, end in webs]
+    with open(filename, "w") as f:
+        json.dump(web_list, f, indent=2)
+
+
+class GameState:
+    """
+    One round of Mario's Slides with no display, audio or clock attached.
+
+    Field names mirror the old main.py globals so the debug panel and any
+    NEAT input code can read them straight off the object. Time is counted
+    in ticks (FPS per second), the same in the live game, turbo and headless
+    runs; pass time_fn (e.g. time.time) to measure SEC_ALIVE in wall clock
+    seconds instead, the way the live game used to.
+
+    snapshot() / restore() save and roll back the whole state in O(1) for
+    rollouts and tree search. The web list, its WebIndex and the rng are
+    shared with snapshots and only copied when the state changes them;
+    used webs are an int bitmask (used_mask), so they never need copying.
+
+    line_count and board_height give bigger boards than the window (e.g. 32
+    VLINEs and 10000 px for a marathon); the pipes are always at pipe_y,
+    PIPE_MARGIN above the bottom. The default is the classic 4-VLINE board.
+    """
+
+    __slots__ = SNAPSHOT_FIELDS + ("time_fn", "line_count", "lines_x", "board_height", "pipe_y", "levels",
+                                   "VLINE_STATE", "_webs_shared", "_rng_shared")
+
+    def __init__(self, seed=None, rng=None, time_fn=None, line_count=LINE_COUNT, board_height=WINDOW_HEIGHT,
+                 levels=None):
+        self.levels = levels if levels is not None else default_levels()
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.time_fn = time_fn
+        self.line_count = line_count
+        self.lines_x = make_lines_x(line_count)
+        self.board_height = board_height
+        self.pipe_y = board_height - PIPE_MARGIN
+        self.webs = []
+        self.web_index = None
+        self._webs_shared = False  # webs / web_index also belong to a snapshot
+        self._rng_shared = False
+        self.used_mask = 0  # Track used webs for sliding: bit WebIndex.slots[w] per used web
+        self.wonGames = 0  # Track number of games won
+        self.TOTAL_TIME_TO_WIN = 0.0
+        self.MARIO_SPEED = MARIO_SPEED_DEFAULT
+        # NEAT inputs, recomputed every frame (kept across round resets like the old globals)
+        self.VLINE_STATE = [0] * line_count
+        self.vline_idx = None  # 0-based VLINE Mario is on, i.e. where VLINE_STATE is 1
+        self.VLINE_PERCENTAGE = 0
+        self.ABOUT_TO_DIE = 1
+        self.ABOUT_TO_WIN = 0
+        self.DIST_NEXT_WEB = -1
+        self.ticks = 0  # step() calls over the whole session, used to time replay input
+        self.rounds = 0
+        self.reset_game()
+
+    @property
+    def websAmount(self):
+        return len(self.webs)
+
+    @property
+    def board_width(self):
+        return self.lines_x[-1] + LINE_SPACING
+
+    @property
+    def used_webs(self):
+        """Ids (web_id) of the webs Mario has used, as a set."""
+        index = self.get_web_index()
+        return {index.ids[w] for w in range(index.count) if self.used_mask >> w & 1}
+
+    # --- Snapshots ---
+    def snapshot(self):
+        """The whole state as a tuple of SNAPSHOT_FIELDS values, for restore()."""
+        self._webs_shared = self._rng_shared = True
+        return _get_snapshot(self)
+
+    def restore(self, snapshot):
+        """Roll back to a snapshot of this or another GameState with the same line_count."""
+        for name, value in zip(SNAPSHOT_FIELDS[:-1], snapshot):
+            setattr(self, name, value)
+        self._webs_shared = self._rng_shared = True
+        vline_idx = snapshot[-1]
+        if vline_idx != self.vline_idx:
+            if self.vline_idx is not None:
+                self.VLINE_STATE[self.vline_idx] = 0
+            if vline_idx is not None:
+                self.VLINE_STATE[vline_idx] = 1
+            self.vline_idx = vline_idx
+
+    # --- Round setup ---
+    def reset_game(self, keep_webs=False):
+        """Start the next round. keep_webs mirrors the old skip_webs_clear flag."""
+        # Each round draws from its own seed so a replay can check (or jump to) any round
+        self.rounds += 1
+        if self._rng_shared:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+            self.rng = rng
+            self._rng_shared = False
+        self.round_seed = self.rng.getrandbits(32)
+        round_rng = random.Random(self.round_seed)
+        stage = self.levels.stage(self.wonGames)
+        self.VLINE_STAR = round_rng.randint(1, self.line_count)  # 1-based index for win VLINE
+        self.mario_x = self.lines_x[round_rng.randint(0, self.line_count - 1)] - MARIO_SIZE // 2
+        stars = [star for star in stage.stars or () if star <= self.line_count]
+        if stars:
+            # Drawn after the start VLINE, so that is the same as with no star rule
+            self.VLINE_STAR = round_rng.choice(stars)
+        self.STAR_IDX = self.VLINE_STAR - 1  # Star sprite always matches the win VLINE
+        self.mario_y = 0
+        self.mario_sliding = False
+        self.slide_target = None
+        self.fall_from_y = None  # Mario's center y before his last straight fall step, for the swept hop test
+        self.game_over = False
+        self.frame = 0
+        self.start_time = self.time_fn() if self.time_fn else 0.0
+        self.SEC_ALIVE = 0.00
+        self.TIME_TO_WIN = None
+        # Only clear webs if this stage does not keep them and webs were not just loaded
+        if not stage.keep_webs and not keep_webs:
+            self._clear_webs()
+        if stage.speed is not None:
+            self.MARIO_SPEED = stage.speed
+        # Rounds get progressively harder: a stage can start on its own map
+        if stage.map and self.wonGames == stage.wins:
+            self._clear_webs()
+            self.load_web_map(stage.map)
+        self.levels.prefetch_after(self.wonGames, self.line_count)
+
+    def new_game(self):
+        """Reset the whole run back to round one (the R key)."""
+        self.wonGames = 0
+        self.TOTAL_TIME_TO_WIN = 0.0
+        self.reset_game()
+
+    def load_web_map(self, filename):
+        try:
+            self.set_webs(self.levels.get_map(filename, self.line_count))
+            return True
+        except Exception as e:
+            print(f"Error loading web map: {e}")
+            return False
+
+    def set_webs(self, webs):
+        used = self.used_webs if self.used_mask else ()
+        self.webs = [(tuple(start), tuple(end)) for start, end in webs]
+        self._webs_shared = False
+        # Used webs are remembered by id, so carry them over to the new list
+        self.used_mask = 0
+        if used:
+            index = self.get_web_index()
+            for w, wid in enumerate(index.ids):
+                if wid in used:
+                    self.used_mask |= 1 << index.slots[w]
+
+    def _clear_webs(self):
+        # A new list rather than clear(), since snapshots may share the old one
+        self.webs = []
+        self._webs_shared = False
+
+    # --- Input ---
+    def snap_to_line(self, mx, my):
+        """Snap a mouse position onto the nearest VLINE, or None if too far from one."""
+        i = bisect_right(self.lines_x, mx)
+        nearest_x = min(self.lines_x[max(0, i - 1):i + 1], key=lambda x: abs(mx - x))
+        if abs(mx - nearest_x) < SNAP_DISTANCE:
+            return (nearest_x, round(my / SNAP_Y) * SNAP_Y)
+        return None
+
+    def place_web(self, start_point, end_point):
+        """
+        Validate and add a web between two snapped points.
+
+        Returns True if the web was added, False if it overlaps an existing
+        web and None if the points do not form a web at all (same or
+        non-adjacent VLINEs), which the live game silently ignores.
+        """
+        if start_point is None or end_point is None or start_point[0] == end_point[0]:
+            return None
+        if start_point[0] not in self.lines_x or end_point[0] not in self.lines_x:
+            return None
+        idx1 = self.lines_x.index(start_point[0])
+        idx2 = self.lines_x.index(end_point[0])
+        if abs(idx1 - idx2) != 1:
+            return None
+        dy = abs(end_point[1] - start_point[1])
+        if dy > MAX_PATH_LENGTH:
+            direction = 1 if end_point[1] > start_point[1] else -1
+            end_point = (end_point[0], start_point[1] + direction * MAX_PATH_LENGTH)
+        # --- Flexible web overlap check: only block if any pixel is already on a web ---
+        if self.get_web_index().crossing(start_point, end_point) is not None:
+            return False
+        if self._webs_shared:
+            # Copy on write: snapshots keep the old list (and its index) as they were
+            webs = self.webs[:]
+            if self.web_index is not None and self.web_index.webs is self.webs:
+                self.web_index = self.web_index.fork(webs)
+            self.webs = webs
+            self._webs_shared = False
+        self.webs.append((start_point, end_point))
+        return True
+
+    def set_fast(self, fast):
+        if fast:
+            self.MARIO_SPEED = MARIO_SPEED_FAST
+        else:
+            self.MARIO_SPEED = self.levels.base_speed(self.wonGames)
+
+    def get_web_index(self):
+        """WebIndex over self.webs, rebuilt when the list is replaced or shrinks."""
+        index = self.web_index
+        if index is None or index.webs is not self.webs or index.count > len(self.webs):
+            index = self.web_index = WebIndex(self.webs, self.lines_x)
+        elif index.count < len(self.webs):
+            index.sync()
+        return index
+
+    # --- Simulation ---
+    def step(self, actions=()):
+        """
+        Apply this frame's actions, then advance the round by one frame.
+
+        actions is an iterable of ("web", start_point, end_point) and
+        ("speed", is_fast) tuples. Returns a list of event names ("snap",
+        "error", "speedup", "pop", "win", "death") so a front-end can play
+        the matching sounds.
+        """
+        events = self.apply_actions(actions)
+        self.ticks += 1
+        if self.game_over:
+            return events
+        self._advance(events)
+        return events
+
+    def apply_actions(self, actions):
+        """Apply input without advancing time (also used while paused)."""
+        events = []
+        for action in actions:
+            if action[0] == "web":
+                placed = self.place_web(action[1], action[2])
+                if placed is not None:
+                    events.append("snap" if placed else "error")
+            elif action[0] == "speed":
+                self.set_fast(action[1])
+                if action[1]:
+                    events.append("speedup")
+        return events
+
+    def _advance(self, events):
+        self.frame += 1
+        if self.time_fn:
+            self.SEC_ALIVE = round(self.time_fn() - self.start_time, 2)
+        else:
+            self.SEC_ALIVE = round(self.frame / FPS, 2)
+
+        mario_center_x = self.mario_x + MARIO_SIZE // 2
+        mario_center_y = self.mario_y + MARIO_SIZE // 2
+        self.VLINE_PERCENTAGE = min(100, int((self.mario_y / (self.pipe_y)) * 100))
+        self.ABOUT_TO_DIE = 1
+        self.ABOUT_TO_WIN = 0
+        # VLINEs are far more than 10 px apart, so only the first one right of x - 5 can be in range
+        i = bisect_right(self.lines_x, mario_center_x - 5)
+        if i < self.line_count and self.lines_x[i] - mario_center_x < 5:
+            mario_vline_idx = i
+        else:
+            mario_vline_idx = None
+        # VLINE_STATE is updated in place, only when Mario changes VLINE
+        if mario_vline_idx != self.vline_idx:
+            if self.vline_idx is not None:
+                self.VLINE_STATE[self.vline_idx] = 0
+            if mario_vline_idx is not None:
+                self.VLINE_STATE[mario_vline_idx] = 1
+            self.vline_idx = mario_vline_idx
+
+        # --- ABOUT_TO_DIE and ABOUT_TO_WIN logic ---
+        index = self.get_web_index()
+        next_web_dist = None
+        if mario_vline_idx is not None:
+            next_web_dist = index.next_web_dist(mario_center_x, mario_center_y)
+        web_below = next_web_dist is not None
+        if web_below or self.mario_sliding:
+            self.ABOUT_TO_DIE = 0
+        star_idx = self.STAR_IDX
+        if mario_vline_idx == star_idx:
+            self.ABOUT_TO_DIE = 0
+            if mario_center_y > index.max_start_y[star_idx]:
+                self.ABOUT_TO_WIN = 1
+        if web_below and mario_vline_idx == star_idx:
+            self.ABOUT_TO_WIN = 0
+        # --- DIST_NEXT_WEB logic ---
+        # If Mario is below all webs on his VLINE, set to -1
+        self.DIST_NEXT_WEB = int(next_web_dist) if next_web_dist is not None else -1
+        # --- Used webs logic ---
+        if self.mario_y <= 0:
+            self.used_mask = 0
+
+        # --- Smooth sliding logic with used webs ---
+        if self.mario_sliding:
+            dx = self.slide_target[0] - self.mario_x
+            dy = self.slide_target[1] - self.mario_y
+            dist = math.hypot(dx, dy)
+            if dist <= self.MARIO_SPEED:
+                self.mario_x, self.mario_y = self.slide_target
+                self.mario_sliding = False
+                events.append("pop")  # Mario gets off the web
+            else:
+                self.mario_x += self.MARIO_SPEED * (dx / dist)
+                self.mario_y += self.MARIO_SPEED * (dy / dist)
+        else:
+            if self.DIST_NEXT_WEB != -1 and self.ABOUT_TO_DIE == 0 and self.ABOUT_TO_WIN == 0:
+                hop = index.find_hop(mario_center_x, mario_center_y, self.MARIO_SPEED + MARIO_SIZE / 4, self.used_mask,
+                                     self.fall_from_y)
+            else:
+                hop = None
+            if hop is not None:
+                w, target = hop
+                self.slide_target = (target[0] - MARIO_SIZE // 2, target[1] - MARIO_SIZE // 2)
+                self.mario_sliding = True
+                self.fall_from_y = None
+                self.used_mask |= 1 << index.slots[w]
+                events.append("pop")
+            else:
+                self.fall_from_y = mario_center_y
+                self.mario_y += self.MARIO_SPEED
+
+        # --- Win / death check once Mario reaches the pipes ---
+        if self.mario_y + MARIO_SIZE >= self.pipe_y:
+            star_x = self.lines_x[star_idx]
+            if abs(mario_center_x - star_x) < 5:
+                if self.pipe_y - self.mario_y < 5:
+                    self.game_over = True
+                    self.TIME_TO_WIN = self.SEC_ALIVE
+                    self.wonGames += 1
+                    self.TOTAL_TIME_TO_WIN += self.TIME_TO_WIN
+                    events.append("win")
+                    self.reset_game()  # Instantly go to next round after win
+            else:
+                self.game_over = True
+                events.append("death")
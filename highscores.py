@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+HIGHSCORE_DB = "highscores.db"
+LEGACY_JSON = "highscore.json"  # Where scores were kept before the database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    wonGames INTEGER NOT NULL,
+    TOTAL_TIME_TO_WIN REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_wins ON scores (wonGames DESC, TOTAL_TIME_TO_WIN);
+CREATE INDEX IF NOT EXISTS scores_by_time ON scores (TOTAL_TIME_TO_WIN);
+"""
+
+
+class HighscoreStore:
+    """
+    Highscores in a local SQLite database.
+
+    add() only puts the entry on a queue; a background thread does the
+    INSERT, so the frame Mario dies on never waits for the disk. Each insert
+    costs the same however long the history is, and an interrupted write
+    rolls back instead of corrupting earlier scores. Leaderboard queries use
+    indexes and only read the rows they return.
+    """
+
+    def __init__(self, filename=HIGHSCORE_DB, legacy_json=LEGACY_JSON):
+        self.filename = filename
+        is_new = not os.path.exists(filename)
+        db = self._connect()
+        db.executescript(SCHEMA)
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            self._import_json(db, legacy_json)
+        db.close()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="highscore-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.filename, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer thread
+        return db
+
+    def _import_json(self, db, legacy_json):
+        try:
+            with open(legacy_json, "r") as f:
+                content = f.read().strip()
+            entries = json.loads(content) if content else []
+            with db:
+                db.executemany(
+                    "INSERT INTO scores (timestamp, wonGames, TOTAL_TIME_TO_WIN) VALUES (?, ?, ?)",
+                    [(e["timestamp"], e["wonGames"], e["TOTAL_TIME_TO_WIN"]) for e in entries],
+                )
+            print(f"Imported {len(entries)} highscores from {legacy_json}")
+        except Exception as e:
+            print(f"Error importing highscores from {legacy_json}: {e}")
+
+    # --- Writing ---
+    def add(self, wonGames, total_time_to_win, timestamp=None):
+        if timestamp is None:
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put((timestamp, wonGames, round(total_time_to_win, 2)))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            entry = self._queue.get()
+            batch = [entry]
+            # Drain whatever else is waiting so a burst costs one commit
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [e for e in batch if e is not None]
+            try:
+                if rows:
+                    with db:
+                        db.executemany(
+                            "INSERT INTO scores (timestamp, wonGames, TOTAL_TIME_TO_WIN) VALUES (?, ?, ?)", rows)
+            except Exception as e:
+                print(f"Error saving highscore: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if None in batch:
+                db.close()
+                return
+
+    def flush(self):
+        """Block until every queued score is on disk."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    # --- Leaderboards ---
+    def _query(self, sql, args):
+        db = self._connect()
+        try:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute(sql, args)]
+        finally:
+            db.close()
+
+    def top_by_wins(self, n=10):
+        """Most wonGames first; ties go to the lower TOTAL_TIME_TO_WIN."""
+        return self._query(
+            "SELECT timestamp, wonGames, TOTAL_TIME_TO_WIN FROM scores"
+            " ORDER BY wonGames DESC, TOTAL_TIME_TO_WIN LIMIT ?", (n,))
+
+    def top_by_time(self, n=10, min_wins=1):
+        """Lowest TOTAL_TIME_TO_WIN among runs with at least min_wins wins."""
+        return self._query(
+            "SELECT timestamp, wonGames, TOTAL_TIME_TO_WIN FROM scores INDEXED BY scores_by_time"
+            " WHERE wonGames >= ? ORDER BY TOTAL_TIME_TO_WIN LIMIT ?", (min_wins, n))
+
+    def count(self):
+        return self._query("SELECT COUNT(*) AS n FROM scores", ())[0]["n"]
+
+
+if __name__ == "__main__":
+    store = HighscoreStore()
+    print("Most wins:")
+    for entry in store.top_by_wins():
+        print(f"  {entry['wonGames']:>3} wins  {entry['TOTAL_TIME_TO_WIN']:>8.2f}s  {entry['timestamp']}")
+    print("Fastest:")
+    for entry in store.top_by_time():
+        print(f"  {entry['TOTAL_TIME_TO_WIN']:>8.2f}s  {entry['wonGames']:>3} wins  {entry['timestamp']}")
+    store.close()
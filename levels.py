@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+
+from game_state import LINE_COUNT, MARIO_SPEED_3, MARIO_SPEED_DEFAULT, MAX_PATH_LENGTH, make_lines_x, read_web_map
+from web_index import find_conflicts
+
+LADDER_FILE = "ladder.json"  # Used instead of DEFAULT_LADDER when present
+MAP_CACHE_SIZE = 16  # Parsed maps kept in memory
+
+# --- Default ladder ---
+# One row per stage of a game, by wins so far. A row applies from `wins`
+# until the next row; fields left out carry over from the row before,
+# except map.
+#   map:       web map loaded when the stage starts (wonGames == wins)
+#   speed:     Mario's speed for the stage (null: leave it as it is)
+#   keep_webs: webs stay between rounds instead of being cleared
+#   stars:     1-based VLINEs the star may be on (null: any)
+DEFAULT_LADDER = [
+    {"wins": 0, "keep_webs": False},
+    {"wins": 3, "map": "3_Round_webMap.json", "speed": MARIO_SPEED_3, "keep_webs": True},
+    {"wins": 5, "map": "5_Round_webMap.json"},
+    {"wins": 10, "map": "10_Round_webMap.json"},
+]
+
+Stage = namedtuple("Stage", ["wins", "map", "speed", "keep_webs", "stars"])
+
+
+def parse_ladder(rows):
+    """Stages from ladder rows (see DEFAULT_LADDER), with carried-over fields filled in."""
+    stages = []
+    carried = {"speed": None, "keep_webs": False, "stars": None}
+    for row in sorted(rows, key=lambda row: row["wins"]):
+        unknown = set(row) - set(Stage._fields)
+        if unknown:
+            raise ValueError(f"unknown ladder fields {sorted(unknown)}")
+        carried.update({key: row[key] for key in carried if key in row})
+        stars = carried["stars"]
+        if stars is not None and (not stars or min(stars) < 1):
+            raise ValueError(f"stars must be 1-based VLINEs, got {stars}")
+        stages.append(Stage(int(row["wins"]), row.get("map"), carried["speed"], bool(carried["keep_webs"]),
+                            tuple(stars) if stars is not None else None))
+    if not stages or stages[0].wins != 0:
+        raise ValueError("the ladder needs a row for 0 wins")
+    return stages
+
+
+def validate_map(webs, lines_x=None):
+    """
+    Problems that place_web would refuse on a board with VLINEs at lines_x
+    (default: the classic board), as strings (empty if the map is fine):
+    webs not joining two adjacent VLINEs, taller than MAX_PATH_LENGTH or
+    crossing another web (every crossing pair is listed).
+    """
+    if lines_x is None:
+        lines_x = make_lines_x()
+    line_of = {x: i for i, x in enumerate(lines_x)}
+    problems = []
+    placed = []  # Indices of webs between adjacent VLINEs
+    for i, (start, end) in enumerate(webs):
+        (x1, y1), (x2, y2) = start, end
+        if x1 not in line_of or x2 not in line_of or abs(line_of[x1] - line_of[x2]) != 1:
+            problems.append(f"web {i} {start}-{end} does not join two adjacent VLINEs")
+            continue
+        if abs(y2 - y1) > MAX_PATH_LENGTH:
+            problems.append(f"web {i} {start}-{end} is taller than {MAX_PATH_LENGTH}")
+        placed.append(i)
+    for a, b in find_conflicts([webs[i] for i in placed], lines_x):
+        i, j = placed[a], placed[b]
+        problems.append(f"web {j} {webs[j][0]}-{webs[j][1]} crosses web {i} {webs[i][0]}-{webs[i][1]}")
+    return problems
+
+
+class LevelPack:
+    """
+    The round progression (a ladder of Stages) and the maps it loads.
+
+    Maps are parsed and validated once per board size (VLINE count) and
+    kept in an LRU cache of cache_size maps. prefetch_after(wins) loads the next stage's map on a
+    background thread, so by the time reset_game needs it the round
+    transition does no file I/O. A map that fails to load is remembered
+    as failed (and not read again) until reload(). One pack is shared by every GameState
+    unless one is passed in (see game_state.default_levels).
+
+    maps gives the contents of some maps ({filename: webs, or None for a
+    map that could not be read}) so they never come from disk, e.g. when
+    a replay rebuilds the pack it was recorded with (see record()).
+    """
+
+    def __init__(self, ladder=DEFAULT_LADDER, cache_size=MAP_CACHE_SIZE, maps=None):
+        self.ladder = list(ladder)
+        self.stages = parse_ladder(ladder)
+        self.inline = dict(maps or {})
+        self._wins = [stage.wins for stage in self.stages]
+        self.cache_size = cache_size
+        self._maps = OrderedDict()
+        self._loading = {}  # (filename, line_count) -> Event set when a prefetch finished
+        self._failed = {}  # (filename, line_count) -> why the map did not load
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, filename, cache_size=MAP_CACHE_SIZE):
+        with open(filename, "r") as f:
+            return cls(json.load(f), cache_size)
+
+    # --- Ladder ---
+    def stage(self, wins):
+        return self.stages[bisect_right(self._wins, wins) - 1]
+
+    def base_speed(self, wins):
+        """Mario's speed with SPACE released."""
+        speed = self.stage(wins).speed
+        return speed if speed is not None else MARIO_SPEED_DEFAULT
+
+    def next_map(self, wins):
+        """The map of the first stage after wins that has one, or None."""
+        for stage in self.stages[bisect_right(self._wins, wins):]:
+            if stage.map:
+                return stage.map
+        return None
+
+    # --- Maps ---
+    def get_map(self, filename, line_count=LINE_COUNT):
+        """The webs of a map, validated for a board of line_count VLINEs, as a tuple; raises on a bad or missing file."""
+        key = (filename, line_count)
+        with self._lock:
+            webs = self._maps.get(key)
+            if webs is not None:
+                self._maps.move_to_end(key)
+                return webs
+            loading = self._loading.get(key)
+        if loading is not None:
+            loading.wait()
+            with self._lock:
+                webs = self._maps.get(key)
+            if webs is not None:
+                return webs
+        with self._lock:
+            failed = self._failed.get(key)
+        if failed is not None:
+            raise ValueError(failed)
+        return self._load(filename, line_count)
+
+    def _load(self, filename, line_count):
+        key = (filename, line_count)
+        try:
+            if filename in self.inline:
+                webs = self.inline[filename]
+                if webs is None:
+                    raise ValueError(f"{filename} could not be read when this ladder was recorded")
+                webs = tuple((tuple(start), tuple(end)) for start, end in webs)
+            else:
+                webs = tuple(read_web_map(filename))
+            problems = validate_map(webs, make_lines_x(line_count))
+            if problems:
+                raise ValueError(f"{filename}: " + "; ".join(problems))
+        except Exception as e:
+            with self._lock:
+                self._failed[key] = str(e)
+            raise
+        with self._lock:
+            self._maps[key] = webs
+            self._maps.move_to_end(key)
+            while len(self._maps) > self.cache_size:
+                self._maps.popitem(last=False)
+        return webs
+
+    def prefetch(self, filename, line_count=LINE_COUNT):
+        """Load a map on a background thread unless it is cached or already loading."""
+        key = (filename, line_count)
+        with self._lock:
+            if key in self._maps or key in self._loading or key in self._failed:
+                return
+            done = self._loading[key] = threading.Event()
+
+        def load():
+            try:
+                self._load(filename, line_count)
+            except Exception as e:
+                print(f"Error loading web map: {e}")
+            finally:
+                with self._lock:
+                    del self._loading[key]
+                done.set()
+        threading.Thread(target=load, daemon=True).start()
+
+    def record(self):
+        """The ladder rows and the current contents of its maps, as JSON-ready data: LevelPack(**record) rebuilds it."""
+        maps = {}
+        for stage in self.stages:
+            if stage.map and stage.map not in maps:
+                if stage.map in self.inline:
+                    maps[stage.map] = self.inline[stage.map]
+                    continue
+                try:
+                    maps[stage.map] = read_web_map(stage.map)
+                except Exception:
+                    maps[stage.map] = None
+        return {"ladder": self.ladder, "maps": maps}
+
+    def reload(self, filename=None):
+        """Forget a map (default: every map), failed or not, so it is read from disk again."""
+        with self._lock:
+            for cache in (self._maps, self._failed):
+                for key in [key for key in cache if filename is None or key[0] == filename]:
+                    del cache[key]
+
+    def prefetch_after(self, wins, line_count=LINE_COUNT):
+        filename = self.next_map(wins)
+        if filename:
+            self.prefetch(filename, line_count)
+
+    def preload(self, line_count=LINE_COUNT):
+        """Load every map of the ladder now (e.g. once per worker process)."""
+        for stage in self.stages:
+            if stage.map:
+                try:
+                    self.get_map(stage.map, line_count)
+                except Exception as e:
+                    print(f"Error loading web map: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a round ladder and its maps, write out the default one "
+                                                 "or list every problem in web maps.")
+    parser.add_argument("command", choices=["check", "dump", "validate"])
+    parser.add_argument("files", nargs="*", help=f"the ladder (default {LADDER_FILE}) or, for validate, web maps")
+    parser.add_argument("--lines", type=int, default=LINE_COUNT, help="VLINE count of the board the maps are for")
+    args = parser.parse_args()
+    ladder = args.files[0] if args.files else LADDER_FILE
+
+    if args.command == "dump":
+        with open(ladder, "w") as f:
+            json.dump(DEFAULT_LADDER, f, indent=2)
+        print(f"Wrote the default ladder to {ladder}")
+    elif args.command == "validate":
+        failed = 0
+        for filename in args.files:
+            webs = read_web_map(filename)
+            problems = validate_map(webs, make_lines_x(args.lines))
+            print(f"{filename}: {len(webs)} webs, {len(problems)} problems")
+            for problem in problems:
+                print(f"  {problem}")
+            failed += bool(problems)
+        raise SystemExit(1 if failed else 0)
+    else:
+        if args.files or os.path.exists(LADDER_FILE):
+            pack = LevelPack.from_file(ladder)
+        else:
+            # What the game plays without a ladder.json (see game_state.default_levels)
+            print(f"No {LADDER_FILE}, checking the default ladder")
+            pack = LevelPack()
+        failed = 0
+        for stage in pack.stages:
+            line = f"{stage.wins:>4} wins: speed {stage.speed}, keep_webs {stage.keep_webs}, stars {stage.stars}"
+            if stage.map:
+                try:
+                    line += f", {stage.map} ({len(pack.get_map(stage.map, args.lines))} webs)"
+                except Exception as e:
+                    line += f", {stage.map} FAILED: {e}"
+                    failed += 1
+            print(line)
+        raise SystemExit(1 if failed else 0)
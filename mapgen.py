@@ -0,0 +1,153 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from game_state import (
+    LINE_COUNT, LINE_SPACING, MARIO_SIZE, MARIO_SPEED_DEFAULT, MAX_PATH_LENGTH, PIPE_Y, SNAP_Y,
+    make_lines_x,
+)
+from mappack import write_pack
+from solver import resolve_round
+from web_index import WebIndex
+
+# --- Generator config ---
+WEB_RANGE = (4, 24)  # Webs per map, inclusive
+MIN_WEB_Y = 4 * SNAP_Y  # Keep webs off the very top so Mario does not loop through y = 0
+MAX_WEB_Y = PIPE_Y - MARIO_SIZE
+ATTEMPTS = 20  # Random tries per web before a crowded map settles for fewer webs
+CHUNK = 250  # Maps per worker task
+
+# --- Difficulty ---
+# difficulty = LOSS_WEIGHT * (share of start/star pairs Mario loses untouched)
+#            + HOP_WEIGHT * min(1, mean hops per round / HOPS_FOR_MAX)
+LOSS_WEIGHT = 0.7
+HOP_WEIGHT = 0.3
+HOPS_FOR_MAX = 10
+
+
+def generate_map(rng, web_count, line_count=LINE_COUNT, max_y=MAX_WEB_Y):
+    """
+    Up to web_count random webs that place_web would accept one after another:
+    adjacent VLINEs, y snapped to SNAP_Y, at most MAX_PATH_LENGTH tall and
+    not crossing an earlier web per segments_intersect (WebIndex.crossing,
+    so only nearby webs are tested).
+    Pass max_y = board pipe_y - MARIO_SIZE for boards taller than the window.
+    """
+    lines_x = make_lines_x(line_count)
+    webs = []
+    index = WebIndex(webs, lines_x)
+    for _ in range(web_count * ATTEMPTS):
+        if len(webs) == web_count:
+            break
+        g = rng.randrange(line_count - 1)
+        y1 = rng.randrange(MIN_WEB_Y, max_y + 1, SNAP_Y)
+        y2 = y1 + rng.randrange(-MAX_PATH_LENGTH, MAX_PATH_LENGTH + 1, SNAP_Y)
+        y2 = min(max_y - max_y % SNAP_Y, max(MIN_WEB_Y, y2))
+        start, end = (lines_x[g], y1), (lines_x[g + 1], y2)
+        if rng.random() < 0.5:
+            start, end = end, start  # Drawn right to left
+        if index.crossing(start, end) is not None:
+            continue
+        webs.append((start, end))
+        index.sync()
+    return webs
+
+
+def score_map(webs, line_count=LINE_COUNT, speed=MARIO_SPEED_DEFAULT):
+    """
+    Play every start VLINE against every star VLINE with the solver.
+
+    Returns (pipes, won, hops, difficulty): (star, start) arrays of the
+    0-based pipe reached (-1 if Mario loops forever), whether that is a win
+    and how many webs he rode, plus the difficulty score in [0, 1].
+    """
+    pipes = np.full((line_count, line_count), -1, dtype=np.int8)
+    won = np.zeros((line_count, line_count), dtype=bool)
+    hops = np.zeros((line_count, line_count), dtype=np.int16)
+    for star in range(line_count):
+        for start in range(line_count):
+            result = resolve_round(webs, start, star, speed, line_count)
+            if result.pipe is not None:
+                pipes[star, start] = result.pipe
+            won[star, start] = result.won
+            hops[star, start] = len(result.path)
+    difficulty = LOSS_WEIGHT * (1 - won.mean()) + HOP_WEIGHT * min(1.0, hops.mean() / HOPS_FOR_MAX)
+    return pipes, won, hops, difficulty
+
+
+def map_rng(seed, i):
+    """Map i of a run depends only on (seed, i), whatever the worker count."""
+    return random.Random(f"{seed}:{i}")
+
+
+def _generate_chunk(task):
+    seed, first, count, web_range, line_count, speed = task
+    maps = []
+    pipes = np.empty((count, line_count, line_count), dtype=np.int8)
+    won = np.empty((count, line_count, line_count), dtype=bool)
+    hops = np.empty((count, line_count, line_count), dtype=np.int16)
+    difficulty = np.empty(count, dtype=np.float32)
+    for k in range(count):
+        rng = map_rng(seed, first + k)
+        webs = generate_map(rng, rng.randint(*web_range), line_count)
+        maps.append(np.array(webs, dtype=np.int16).reshape(-1, 4))
+        pipes[k], won[k], hops[k], difficulty[k] = score_map(webs, line_count, speed)
+    return maps, pipes, won, hops, difficulty
+
+
+def generate(count, seed=0, processes=None, web_range=WEB_RANGE, line_count=LINE_COUNT, speed=MARIO_SPEED_DEFAULT):
+    """
+    Generate and score count maps on a process pool. Yields chunks of
+    (maps, pipes, won, hops, difficulty) in map order; each map is an
+    (n, 4) int16 array, ready for mappack.write_pack.
+    """
+    tasks = [(seed, first, min(CHUNK, count - first), web_range, line_count, speed)
+             for first in range(0, count, CHUNK)]
+    if processes == 1:
+        yield from map(_generate_chunk, tasks)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(_generate_chunk, tasks)
+
+
+def generate_pack(filename, count, seed=0, processes=None, web_range=WEB_RANGE,
+                  line_count=LINE_COUNT, speed=MARIO_SPEED_DEFAULT):
+    """
+    Write count maps to a map pack and their scores next to it as
+    <filename>.scores.npz (arrays pipes, won, hops, difficulty, indexed like the pack).
+    """
+    scores = {"pipes": [], "won": [], "hops": [], "difficulty": []}
+
+    def maps():
+        for chunk_maps, pipes, won, hops, difficulty in generate(count, seed, processes, web_range, line_count, speed):
+            for name, values in zip(("pipes", "won", "hops", "difficulty"), (pipes, won, hops, difficulty)):
+                scores[name].append(values)
+            yield from chunk_maps
+
+    write_pack(maps(), filename, line_count, LINE_SPACING)
+    scores = {name: np.concatenate(values) for name, values in scores.items()}
+    np.savez(filename + ".scores.npz", seed=seed, **scores)
+    return scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate random web maps under the placement rules and score them.")
+    parser.add_argument("out", help="map pack to write (scores go to <out>.scores.npz)")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--webs", type=int, nargs=2, default=WEB_RANGE, metavar=("MIN", "MAX"))
+    parser.add_argument("--lines", type=int, default=LINE_COUNT)
+    parser.add_argument("--speed", type=float, default=MARIO_SPEED_DEFAULT)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores = generate_pack(args.out, args.count, args.seed, args.processes, tuple(args.webs), args.lines, args.speed)
+    elapsed = time.perf_counter() - start
+    looping = (scores["pipes"] < 0).any(axis=(1, 2)).sum()
+    print(f"Wrote {args.count} maps to {args.out} in {elapsed:.1f}s ({args.count / elapsed * 60:.0f} maps/min)")
+    print(f"mean difficulty {scores['difficulty'].mean():.3f}, {looping} maps where some round never ends")
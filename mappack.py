@@ -0,0 +1,137 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from game_state import LINE_COUNT, LINE_SPACING, read_web_map, write_web_map
+
+# --- File format ---
+# Header (32 bytes): MAGIC, u16 version, u16 LINE_COUNT, u16 LINE_SPACING,
+# u16 reserved, u64 map count, u64 byte offset of the offset table, 4 pad.
+# Then every web of every map as little-endian int16 [x1, y1, x2, y2], and
+# finally (map count + 1) u64 offsets: map i is webs[offsets[i]:offsets[i + 1]].
+# The offset table goes last so packs can be written in one streaming pass.
+MAGIC = b"MSMP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHQQ4x")
+WEB_DTYPE = np.dtype("<i2")
+
+
+class MapPackError(Exception):
+    pass
+
+
+def write_pack(maps, filename, line_count=LINE_COUNT, line_spacing=LINE_SPACING):
+    """Write an iterable of web lists (the save_web_map format) as a map pack. Returns the map count."""
+    offsets = array("Q", [0])
+    with open(filename, "wb") as f:
+        f.write(bytes(HEADER.size))
+        for webs in maps:
+            data = np.asarray(webs, dtype=np.int64).reshape(-1, 4)
+            if data.size and (data.min() < -32768 or data.max() > 32767):
+                raise MapPackError(f"map {len(offsets) - 1} has coordinates outside int16")
+            f.write(data.astype(WEB_DTYPE).tobytes())
+            offsets.append(offsets[-1] + len(data))
+        pos = f.tell()
+        f.write(bytes(-pos % 8))  # keep the offset table 8-byte aligned
+        offsets_pos = f.tell()
+        f.write(np.asarray(offsets, dtype="<u8").tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, line_count, line_spacing, 0, len(offsets) - 1, offsets_pos))
+    return len(offsets) - 1
+
+
+class MapPack:
+    """
+    Read-only, memory-mapped map pack.
+
+    pack[i] is a zero-copy (n_webs, 4) int16 view of map i; pack.webs(i)
+    gives the same map as the list of ((x1, y1), (x2, y2)) tuples GameState
+    uses. Nothing is parsed or copied until a map is asked for.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise MapPackError(f"{filename} is too short to be a map pack")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.line_count, self.line_spacing, _, count, offsets_pos = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise MapPackError(f"{filename} is not a version {VERSION} map pack")
+        self.offsets = np.frombuffer(self._mm, dtype="<u8", count=count + 1, offset=offsets_pos)
+        total = int(self.offsets[-1])
+        self.data = np.frombuffer(self._mm, dtype=WEB_DTYPE, count=total * 4, offset=HEADER.size).reshape(total, 4)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"map {i} out of range for {len(self)} maps")
+        i %= len(self)
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def webs(self, i):
+        return [((x1, y1), (x2, y2)) for x1, y1, x2, y2 in self[i].tolist()]
+
+    def close(self):
+        self.offsets = self.data = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # A caller still holds a map view; the mapping closes once it is garbage collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- JSON converters ---
+def json_to_pack(json_files, filename, line_count=LINE_COUNT, line_spacing=LINE_SPACING):
+    return write_pack((read_web_map(name) for name in json_files), filename, line_count, line_spacing)
+
+
+def pack_to_json(pack_file, out_folder):
+    """Write every map in a pack as <out_folder>/<i>_webMap.json. Returns the file names."""
+    os.makedirs(out_folder, exist_ok=True)
+    names = []
+    with MapPack(pack_file) as pack:
+        for i in range(len(pack)):
+            name = os.path.join(out_folder, f"{i}_webMap.json")
+            write_web_map(pack.webs(i), name)
+            names.append(name)
+    return names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert web maps between JSON and the binary map pack format.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pack_cmd = sub.add_parser("pack", help="pack JSON maps into one file")
+    pack_cmd.add_argument("out")
+    pack_cmd.add_argument("maps", nargs="+")
+    unpack_cmd = sub.add_parser("unpack", help="write every map in a pack back out as JSON")
+    unpack_cmd.add_argument("pack")
+    unpack_cmd.add_argument("out_folder")
+    info_cmd = sub.add_parser("info", help="print a pack's header")
+    info_cmd.add_argument("pack")
+    args = parser.parse_args()
+    if args.command == "pack":
+        print(f"Packed {json_to_pack(args.maps, args.out)} maps into {args.out}")
+    elif args.command == "unpack":
+        print(f"Wrote {len(pack_to_json(args.pack, args.out_folder))} maps to {args.out_folder}")
+    else:
+        with MapPack(args.pack) as pack:
+            print(json.dumps({
+                "maps": len(pack),
+                "webs": len(pack.data),
+                "LINE_COUNT": pack.line_count,
+                "LINE_SPACING": pack.line_spacing,
+            }))
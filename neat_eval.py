@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from env import MarioSlidesEnv, MAX_TICKS, SCALAR_OBS
+from game_state import LINE_COUNT, PIPE_Y, default_levels
+
+SEEDS = tuple(range(8))  # Rounds every genome plays, so fitness is comparable across generations
+WON_WEIGHT = 1.0
+TIME_WEIGHT = 0.001  # Per second of TOTAL_TIME_TO_WIN: among equal wins, faster is better
+
+
+def neat_policy(genome, config):
+    """
+    Default policy: a neat-python feed-forward net over the env observation.
+
+    The net needs 4 outputs: place a web when out[0] > 0.5, on gap
+    out[1] * (VLINE count - 1), from y out[2] * PIPE_Y to y out[3] * PIPE_Y.
+    """
+    import neat  # Only needed in the workers; the game itself never imports it
+
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+
+    def policy(obs):
+        out = net.activate(obs)
+        if out[0] <= 0.5:
+            return None
+        gaps = len(obs) - SCALAR_OBS - 1
+        gap = min(gaps - 1, max(0, int(out[1] * gaps)))
+        return gap, out[2] * PIPE_Y, out[3] * PIPE_Y
+    return policy
+
+
+def episode_fitness(state):
+    return WON_WEIGHT * state.wonGames - TIME_WEIGHT * state.TOTAL_TIME_TO_WIN
+
+
+# --- Worker side ---
+# Set once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(config, make_policy, fitness_fn, seeds, line_count, max_ticks):
+    # Parse the round maps once, so reset_game never reads them from disk again
+    default_levels().preload(line_count)
+    _worker.update(
+        config=config,
+        make_policy=make_policy,
+        fitness_fn=fitness_fn,
+        seeds=seeds,
+        env=MarioSlidesEnv(line_count=line_count, max_ticks=max_ticks),
+        shm={},
+    )
+
+
+def _fitness_array(name, rows):
+    """The shared (rows, len(seeds) + 1) fitness table, attached once per worker."""
+    shm = _worker["shm"].get(name)
+    if shm is None:
+        # The table grew: let go of the old one the evaluator has unlinked
+        for old in _worker["shm"].values():
+            old.close()
+        _worker["shm"].clear()
+        shm = _worker["shm"][name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray((rows, len(_worker["seeds"]) + 1), dtype=np.float64, buffer=shm.buf)
+
+
+def _evaluate(task):
+    """Play every seed for one genome and write its row of the fitness table."""
+    name, rows, slot, genome = task
+    table = _fitness_array(name, rows)
+    policy = _worker["make_policy"](genome, _worker["config"])
+    env = _worker["env"]
+    fitness_fn = _worker["fitness_fn"]
+    for i, seed in enumerate(_worker["seeds"]):
+        obs = env.reset(seed)
+        done = False
+        while not done:
+            obs, _, done, _ = env.step(policy(obs))
+        table[slot, i] = fitness_fn(env.state)
+    table[slot, -1] = table[slot, :-1].mean()
+
+
+class PopulationEvaluator:
+    """
+    Scores NEAT genomes on a multiprocessing pool.
+
+    Workers start once, preload the ladder's maps and keep one headless
+    env each. Every genome plays the same seeds (full games through the
+    usual reset_game progression). Per-seed and mean fitness go into a
+    shared-memory table rather than back through the pool as pickles.
+    Pass evaluate straight to neat.Population.run, and call close() when
+    done.
+    """
+
+    def __init__(self, config=None, seeds=SEEDS, processes=None, make_policy=neat_policy,
+                 fitness_fn=episode_fitness, line_count=LINE_COUNT, max_ticks=MAX_TICKS):
+        self.seeds = tuple(seeds)
+        self.processes = processes or os.cpu_count()
+        if os.name == "posix":
+            # Start the resource tracker before the workers so they share it
+            # instead of each starting one that "cleans up" the table on exit
+            resource_tracker.ensure_running()
+        self.pool = multiprocessing.Pool(
+            self.processes, _init_worker, (config, make_policy, fitness_fn, self.seeds, line_count, max_ticks))
+        self.shm = None
+        self.rows = 0
+        # (population, len(seeds) + 1) view of the shared table; the last column is the mean
+        self.fitness = None
+
+    def _table(self, rows):
+        if rows > self.rows:
+            self._release()
+            size = rows * (len(self.seeds) + 1) * 8
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.rows = rows
+        self.fitness = np.ndarray((self.rows, len(self.seeds) + 1), dtype=np.float64, buffer=self.shm.buf)
+        return self.fitness
+
+    def evaluate(self, genomes, config=None):
+        """Set genome.fitness for every (genome_id, genome) pair, neat-python style."""
+        genomes = list(genomes)
+        table = self._table(len(genomes))
+        table[:len(genomes)] = np.nan
+        tasks = [(self.shm.name, self.rows, slot, genome) for slot, (_, genome) in enumerate(genomes)]
+        chunksize = max(1, len(tasks) // (self.processes * 4))
+        for _ in self.pool.imap_unordered(_evaluate, tasks, chunksize):
+            pass
+        for slot, (_, genome) in enumerate(genomes):
+            genome.fitness = float(table[slot, -1])
+        return table[:len(genomes)]
+
+    def _release(self):
+        if self.shm is not None:
+            self.fitness = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
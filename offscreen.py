@@ -0,0 +1,282 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shlex
+import struct
+import subprocess
+import time
+import zlib
+
+import pygame
+
+from game_state import FPS, LINE_COUNT, GameState, read_web_map
+
+OUT_FOLDER = "renders/"
+STRIP_FRAMES = 10  # Frames side by side in one PNG strip
+MAX_TICKS = 60 * FPS  # A simulated round that has not ended by then is cut off
+PNG_LEVEL = 1  # zlib level for strips: pygame.image.save compresses ~4x slower for ~15% smaller files
+
+# --- Sources ---
+# A job is (kind, path, arg):
+#   ("replay", "replays/x.msr", None)  the whole recorded session
+#   ("map", "webMap.json", seed)       one round of the map with that seed
+#   ("pack", "maps.mspack", (i, seed)) one round of map i of a map pack
+
+
+def jobs_for(paths, seeds=(0,)):
+    """Jobs for replay files, JSON web maps and map packs (every map of a pack, once per seed)."""
+    jobs = []
+    for path in paths:
+        if path.endswith(".msr"):
+            jobs.append(("replay", path, None))
+        elif path.endswith(".mspack"):
+            from mappack import MapPack
+            with MapPack(path) as pack:
+                count = len(pack)
+            jobs.extend(("pack", path, (i, seed)) for i in range(count) for seed in seeds)
+        else:
+            jobs.extend(("map", path, seed) for seed in seeds)
+    return jobs
+
+
+def job_name(job):
+    kind, path, arg = job
+    base = os.path.splitext(os.path.basename(path))[0]
+    if kind == "replay":
+        return base
+    if kind == "map":
+        return f"{base}_s{arg}"
+    return f"{base}_{arg[0]:06d}_s{arg[1]}"
+
+
+def play_job(job, on_step, on_events, max_ticks=MAX_TICKS):
+    """Play a job headlessly, calling on_step(state) after every step and on_events(tick, events)."""
+    kind, path, arg = job
+    if kind == "replay":
+        from replay import play_replay
+        play_replay(path, on_events, on_step)
+        return
+    if kind == "map":
+        webs, line_count, seed = read_web_map(path), LINE_COUNT, arg
+    else:
+        from mappack import MapPack
+        with MapPack(path) as pack:
+            webs, line_count, seed = pack.webs(arg[0]), pack.line_count, arg[1]
+    state = GameState(seed=seed, line_count=line_count)
+    state.set_webs(webs)
+    on_step(state)
+    while state.ticks < max_ticks:
+        events = state.step()
+        if events:
+            on_events(state.ticks, events)
+        on_step(state)
+        if "win" in events or "death" in events:
+            break
+
+
+# --- Writers ---
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(filename, surface, level=PNG_LEVEL):
+    """Save surface as an 8-bit RGB PNG (no row filters)."""
+    width, height = surface.get_size()
+    data = pygame.image.tobytes(surface, "RGB")
+    stride = width * 3
+    rows = b"".join(b"\x00" + data[y * stride:(y + 1) * stride] for y in range(height))
+    with open(filename, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(rows, level)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+class StripWriter:
+    """
+    Frames packed side by side, per_strip to a PNG (<name>_0000.png, ...).
+    The tick of every stored frame goes to <name>.json, since frames where
+    the board did not change are never stored (with --hud their debug
+    text may be a few ticks old).
+    """
+
+    def __init__(self, out_dir, name, size, per_strip=STRIP_FRAMES):
+        self.prefix = os.path.join(out_dir, name)
+        self.size = size
+        self.per_strip = per_strip
+        self.strip = pygame.Surface((size[0] * per_strip, size[1]))
+        self.count = 0  # Frames in the current strip
+        self.strips = 0
+        self.ticks = []
+
+    def add(self, tick, frame, changed):
+        if not changed:
+            return
+        self.strip.blit(frame, (self.count * self.size[0], 0))
+        self.ticks.append(tick)
+        self.count += 1
+        if self.count == self.per_strip:
+            self._flush()
+
+    def _flush(self):
+        if self.count:
+            strip = self.strip.subsurface((0, 0, self.count * self.size[0], self.size[1]))
+            write_png(f"{self.prefix}_{self.strips:04d}.png", strip)
+            self.strips += 1
+            self.count = 0
+
+    def close(self):
+        self._flush()
+        return {"strips": self.strips, "per_strip": self.per_strip, "frames": self.ticks}
+
+
+class RawWriter:
+    """
+    Every frame as raw RGB24 bytes, to <name>.rgb or to the stdin of an
+    encoder command (e.g. ffmpeg reading rawvideo from "-"). A video needs
+    a frame per tick, so unchanged frames repeat the last frame's bytes
+    instead of being converted again.
+    """
+
+    def __init__(self, out_dir, name, size, encoder=None, fps=FPS):
+        self.frames = 0
+        self.last = None
+        prefix = os.path.join(out_dir, name)
+        if encoder:
+            command = encoder.format(width=size[0], height=size[1], fps=fps, name=prefix)
+            self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE)
+            self.f = self.process.stdin
+        else:
+            self.process = None
+            self.f = open(prefix + ".rgb", "wb")
+
+    def add(self, tick, frame, changed):
+        if changed:
+            self.last = pygame.image.tobytes(frame, "RGB")
+        self.f.write(self.last)
+        self.frames += 1
+
+    def close(self):
+        self.f.close()
+        if self.process is not None and self.process.wait() != 0:
+            print(f"Error encoding: the encoder exited with {self.process.returncode}")
+        return {"frames": self.frames}
+
+
+# --- Worker side ---
+# Set once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(options):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # Leave SIGTERM alone, or SDL swallows it and Pool.terminate() waits forever
+    os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+    from game_state import WINDOW_HEIGHT, WINDOW_WIDTH
+    from assets import AssetManager
+    from render import Renderer
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    assets = AssetManager()
+    scale = options["scale"]
+    # Mario moves ~1px a tick: snapped to the output pixel grid, a step that
+    # scaling would hide leaves the board (and so the frame) unchanged
+    renderer = Renderer(screen, assets.image("mario"), assets.image("star"), assets.image("pipe"), assets.image("bg"),
+                        hud=options["hud"], snap=max(1, round(1 / scale)))
+    size = (max(1, int(WINDOW_WIDTH * scale)), max(1, int(WINDOW_HEIGHT * scale)))
+    _worker.update(options, screen=screen, renderer=renderer, size=size)
+
+
+def render_job(job):
+    """Render one job; returns (name, ticks played, frames drawn, frames that changed, seconds)."""
+    start = time.perf_counter()
+    screen, renderer, size = _worker["screen"], _worker["renderer"], _worker["size"]
+    every = _worker["every"]
+    name = job_name(job)
+    if _worker["raw"]:
+        writer = RawWriter(_worker["out"], name, size, _worker["encoder"], FPS / every)
+    else:
+        writer = StripWriter(_worker["out"], name, size, _worker["per_strip"])
+    # A new board: the static layer and dirty rects from the last job are no use
+    renderer.static_key = None
+    renderer.invalidate()
+    events = []
+    stats = {"ticks": 0, "drawn": 0, "changed": 0}
+
+    def on_step(state):
+        stats["ticks"] = state.ticks
+        if state.ticks % every:
+            return
+        changed = bool(renderer.draw(state))
+        stats["drawn"] += 1
+        if changed:
+            stats["changed"] += 1
+        frame = None
+        if changed:
+            frame = screen if size == screen.get_size() else pygame.transform.scale(screen, size)
+        writer.add(state.ticks, frame, changed)
+
+    try:
+        play_job(job, on_step, lambda tick, names: events.append([tick, names]), _worker["max_ticks"])
+    finally:
+        index = writer.close()
+    index.update(source=job[1], arg=job[2], width=size[0], height=size[1], every=every, ticks=stats["ticks"],
+                 events=events)
+    with open(os.path.join(_worker["out"], name + ".json"), "w") as f:
+        json.dump(index, f)
+    return name, stats["ticks"], stats["drawn"], stats["changed"], time.perf_counter() - start
+
+
+def render_all(jobs, out=OUT_FOLDER, processes=None, scale=1.0, every=1, per_strip=STRIP_FRAMES, raw=False,
+               encoder=None, max_ticks=MAX_TICKS, hud=False):
+    """
+    Render jobs on a process pool (one display-less pygame per worker).
+    Yields render_job results as jobs finish. The debug text is only drawn
+    with hud; either way a frame counts as changed when the board does.
+    """
+    os.makedirs(out, exist_ok=True)
+    options = dict(out=out, scale=scale, every=every, per_strip=per_strip, raw=raw, encoder=encoder,
+                   max_ticks=max_ticks, hud=hud)
+    if processes == 1:
+        _init_worker(options)
+        yield from map(render_job, jobs)
+        return
+    with multiprocessing.Pool(processes, _init_worker, (options,)) as pool:
+        yield from pool.imap_unordered(render_job, jobs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render replays and simulated rounds offscreen to PNG strips "
+                                                 "or raw video frames.")
+    parser.add_argument("sources", nargs="+", help="replay files (.msr), web maps (.json) or map packs (.mspack)")
+    parser.add_argument("--out", default=OUT_FOLDER)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="round seeds for maps and map packs")
+    parser.add_argument("--scale", type=float, default=1.0, help="frame size relative to the window")
+    parser.add_argument("--every", type=int, default=1, help="keep every Nth tick")
+    parser.add_argument("--strip", type=int, default=STRIP_FRAMES, help="frames per PNG strip")
+    parser.add_argument("--raw", action="store_true", help="write raw RGB24 frames instead of PNG strips")
+    parser.add_argument("--encoder", help="command the raw frames are piped to, with {width} {height} {fps} {name}, "
+                                          "e.g. \"ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} "
+                                          "-r {fps} -i - {name}.mp4\" (implies --raw)")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--hud", action="store_true", help="draw the debug text and notes as in the game window")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    jobs = jobs_for(args.sources, args.seeds)
+    start = time.perf_counter()
+    total_ticks = total_drawn = total_changed = 0
+    for name, ticks, drawn, changed, seconds in render_all(jobs, args.out, args.processes, args.scale, args.every,
+                                                    args.strip, args.raw or bool(args.encoder), args.encoder,
+                                                    args.max_ticks, args.hud):
+        total_ticks += ticks
+        total_drawn += drawn
+        total_changed += changed
+        print(f"{name}: {ticks} ticks, {changed} changed frames, {seconds:.1f}s")
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(jobs)} rounds to {args.out} in {elapsed:.1f}s "
+          f"({total_ticks / FPS / max(elapsed, 1e-9):.0f}x real time, {total_drawn - total_changed} unchanged frames skipped)")
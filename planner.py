@@ -0,0 +1,208 @@
+import math
+from bisect import bisect_right
+from collections import namedtuple
+
+from game_state import (
+    MARIO_SIZE, MARIO_SPEED_DEFAULT, MAX_PATH_LENGTH, PIPE_Y, SNAP_Y, WINDOW_HEIGHT,
+)
+from solver import DEATH_Y, HALF, WIN_Y, resolve_from
+from web_index import segments_intersect
+
+# --- Search config ---
+BEAM = 6  # Boards kept per depth (closest pipe to the star first)
+MAX_SIMS = 100  # Boards simulated per search before giving up
+CACHE_SIZE = 20000
+
+# webs: the placements in the order to draw them; result: the RoundResult they lead to
+Plan = namedtuple("Plan", ["webs", "result"])
+
+
+def _snap_up(y):
+    return -(-y // SNAP_Y) * SNAP_Y
+
+
+def _snap_down(y):
+    return y // SNAP_Y * SNAP_Y
+
+
+class Planner:
+    """
+    Finds up to k new webs that carry Mario to the star.
+
+    Boards are simulated with solver.resolve_from, trying new webs on top
+    of the current WebIndex without re-indexing. Candidate webs start on a
+    VLINE Mario is about to fall down and end on a neighbouring VLINE.
+    Landing heights are grouped into classes by the web endpoints (and
+    win/death/top-of-screen heights) on the landing VLINE, since Mario
+    behaves the same anywhere inside one class. Only one web per class
+    is simulated, the earliest one that place_web would accept. Boards are
+    searched best-first by how close Mario ends up to the star, and every
+    result is cached on the canonical board (the sorted new webs), so
+    orderings that reach the same board are only simulated once.
+
+    Keep one Planner per board: the cache is dropped when the WebIndex or
+    its web count changes.
+    """
+
+    def __init__(self, beam=BEAM, max_sims=MAX_SIMS):
+        self.beam = beam
+        self.max_sims = max_sims
+        self.cache = {}
+        self._board = None
+        self.sims = 0
+
+    def _play(self, index, root, extra):
+        key = (root, extra)
+        result = self.cache.get(key)
+        if result is None:
+            line, mario_y, used, star_idx, speed = root
+            trace = []
+            result = resolve_from(index, line, mario_y, star_idx, speed, used, extra, trace=trace)
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.clear()
+            result = self.cache[key] = (result, trace)
+            self.sims += 1
+        return result
+
+    def search(self, index, line, mario_y, star_idx, k=3, speed=MARIO_SPEED_DEFAULT, used=()):
+        """
+        Best Plan of at most k webs for Mario falling down `line` (0-based)
+        at mario_y, or None if none was found within max_sims boards.
+        A Plan with no webs means Mario already reaches the star.
+        """
+        if index.irregular:
+            return None  # Hand-edited maps are only handled by the frame-stepped engine
+        board = (id(index.webs), index.count)
+        if board != self._board:
+            self.cache.clear()
+            self._board = board
+        self.sims = 0
+        root = (line, mario_y, frozenset(used), star_idx, speed)
+        result, trace = self._play(index, root, ())
+        if result.won:
+            return Plan([], result)
+        frontier = [((), result, trace)]
+        for _ in range(k):
+            found = []
+            for extra, result, trace in frontier:
+                # Only redirect falls after the last web added, the rest is covered by other orderings
+                first = self._first_fall_after(index, result, extra)
+                for web in self._candidates(index, trace[first:], extra, speed, star_idx):
+                    board_extra = tuple(sorted(extra + (web,)))
+                    if (root, board_extra) in self.cache:
+                        continue
+                    new_result, new_trace = self._play(index, root, board_extra)
+                    if new_result.won:
+                        return Plan(list(board_extra), new_result)
+                    found.append((board_extra, new_result, new_trace))
+                    if self.sims >= self.max_sims:
+                        return None
+            found.sort(key=lambda item: self._distance(item[1], star_idx))
+            frontier = found[:self.beam]
+        return None
+
+    def _first_fall_after(self, index, result, extra):
+        if not extra:
+            return 0
+        base = len(index.webs)
+        last = 0
+        for i, w in enumerate(result.path):
+            if w >= base:
+                last = i + 1
+        return last
+
+    @staticmethod
+    def _distance(result, star_idx):
+        return abs(result.pipe - star_idx) if result.pipe is not None else math.inf
+
+    def _candidates(self, index, falls, extra, speed, star_idx):
+        """One placeable web per (fall, side, landing class), earliest catch first."""
+        lines_x = index.lines_x
+        radius = speed + MARIO_SIZE / 4
+        for line, y0, y1 in falls:
+            x = lines_x[line]
+            for side in (line - 1, line + 1):
+                if not 0 <= side < len(lines_x):
+                    continue
+                side_x = lines_x[side]
+                bounds = sorted({y for y, _ in index.line_webs[side]}
+                                | {p[1] for web in extra for p in web if p[0] == side_x}
+                                | {HALF, DEATH_Y + HALF, WIN_Y + HALF})
+                taken = set()
+                top = max(0, _snap_up(math.ceil(y0 + HALF - radius)))
+                bottom = min(WINDOW_HEIGHT, _snap_down(math.floor(y1 + HALF + radius)))
+                for y_near in range(top, bottom + 1, SNAP_Y):
+                    low = max(0, y_near - MAX_PATH_LENGTH)
+                    high = min(WINDOW_HEIGHT, y_near + MAX_PATH_LENGTH)
+                    for y_far in self._class_picks(bounds, low, high, y_near, taken):
+                        web = ((x, y_near), (side_x, y_far))
+                        if self._placeable(index, web, extra):
+                            taken.add(bisect_right(bounds, y_far))
+                            yield web
+
+    @staticmethod
+    def _class_picks(bounds, low, high, y_near, taken):
+        """For each landing class in [low, high] not yet taken, the snapped y closest to y_near."""
+        edges = [low] + [b for b in bounds if low < b <= high] + [high + 1]
+        for lo, hi in zip(edges, edges[1:]):
+            cls = bisect_right(bounds, lo)
+            if cls in taken:
+                continue
+            lo, hi = _snap_up(lo), _snap_down(hi - 1)
+            if lo > hi:
+                continue
+            yield min(hi, max(lo, y_near))
+
+    @staticmethod
+    def _placeable(index, web, extra):
+        """place_web's checks for a snapped web between adjacent VLINEs (overlap is the only one left)."""
+        if web in extra or web[::-1] in extra:
+            return False
+        if index.crossing(web[0], web[1]) is not None:
+            return False
+        for start, end in extra:
+            if segments_intersect(web[0], web[1], start, end):
+                return False
+        return True
+
+
+class PlacementHinter:
+    """
+    Keeps a Plan for a live GameState, re-checking it each frame with one
+    simulation and searching again only when it no longer works. After a
+    failed search it waits for Mario to reach another VLINE, or for the
+    board, star or speed to change, before trying again.
+    """
+
+    def __init__(self, k=3, planner=None):
+        self.k = k
+        self.planner = planner or Planner()
+        self.plan = None
+        self._key = None
+
+    def update(self, state):
+        """The current Plan for state (None while sliding, after the round or if nothing was found)."""
+        if state.game_over:
+            return None
+        if state.pipe_y != PIPE_Y:
+            return None  # The solver only knows the classic board height
+        if state.mario_sliding:
+            return self.plan  # Mario is on a web; look again once he lands
+        center_x = state.mario_x + HALF
+        if center_x not in state.lines_x:
+            return None
+        index = state.get_web_index()
+        line = state.lines_x.index(center_x)
+        key = (id(index.webs), index.count, state.STAR_IDX, state.MARIO_SPEED, state.rounds, line)
+        if key == self._key:
+            if self.plan is None:
+                return None
+            result = resolve_from(index, line, state.mario_y, state.STAR_IDX, state.MARIO_SPEED,
+                                  state.used_webs, tuple(self.plan.webs))
+            if result.won:
+                self.plan = Plan(self.plan.webs, result)
+                return self.plan
+        self._key = key
+        self.plan = self.planner.search(index, line, state.mario_y, state.STAR_IDX, self.k, state.MARIO_SPEED,
+                                        state.used_webs)
+        return self.plan
@@ -0,0 +1,117 @@
+import json
+import os
+from collections import deque
+from time import perf_counter_ns
+
+# --- Phases ---
+# In the order they happen in main.py's frame loop. "highscore" only costs
+# anything on the frame Mario dies; the rest run every frame.
+PHASES = ("events", "physics", "highscore", "background", "webs", "sprites", "text", "flip")
+
+WINDOW = 600  # Frames kept for the rolling percentiles (10 s at 60 FPS)
+HISTOGRAM_MS = (4, 8, 12, 16.7, 20, 33.4, 50)  # Upper edges of the frame-time buckets, plus one open-ended bucket
+TRACE_EVENTS = 200000  # Newest Chrome-trace events kept for export
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, perf_counter_ns())
+
+
+class FrameProfiler:
+    """
+    Times each phase of the frame loop.
+
+    Wrap work in `with profiler.phase("physics"):` and call frame() once at
+    the top of every frame. Keeps the last WINDOW frames for p50/p95/p99
+    per phase and a frame-time histogram, and the newest TRACE_EVENTS
+    phases as Chrome trace events (load the export in chrome://tracing or
+    Perfetto).
+    """
+
+    def __init__(self, window=WINDOW):
+        self.origin = perf_counter_ns()
+        self.frame_start = None
+        self.frame_ms = deque(maxlen=window)
+        self.phase_ms = {name: deque(maxlen=window) for name in PHASES}
+        self._current = {}
+        self.trace = deque(maxlen=TRACE_EVENTS)
+        self.frames = 0
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, start, end):
+        self._current[name] = self._current.get(name, 0) + end - start
+        self.trace.append((name, start, end))
+
+    def frame(self):
+        """Close the previous frame (if any) and start timing a new one."""
+        now = perf_counter_ns()
+        if self.frame_start is not None:
+            self.frame_ms.append((now - self.frame_start) / 1e6)
+            for name, values in self.phase_ms.items():
+                values.append(self._current.get(name, 0) / 1e6)
+            self.trace.append(("frame", self.frame_start, now))
+            self.frames += 1
+        self._current = {}
+        self.frame_start = now
+
+    # --- Stats ---
+    def percentiles(self, name="frame"):
+        """(p50, p95, p99) in ms over the rolling window, for a phase or the whole frame."""
+        values = sorted(self.frame_ms if name == "frame" else self.phase_ms[name])
+        return tuple(percentile(values, p) for p in (50, 95, 99))
+
+    def histogram(self):
+        """[(bucket upper edge in ms or None for the last bucket, frame count), ...] over the window."""
+        counts = [0] * (len(HISTOGRAM_MS) + 1)
+        for ms in self.frame_ms:
+            for i, edge in enumerate(HISTOGRAM_MS):
+                if ms < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return list(zip(HISTOGRAM_MS + (None,), counts))
+
+    def overlay_lines(self):
+        lines = [f"{'ms':<10}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name in ("frame",) + PHASES:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{name:<10}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+        total = max(1, len(self.frame_ms))
+        for edge, count in self.histogram():
+            label = f"<{edge}ms" if edge is not None else f">={HISTOGRAM_MS[-1]}ms"
+            lines.append(f"{label:<10}{count:>5} " + "#" * round(20 * count / total))
+        return lines
+
+    # --- Export ---
+    def export_trace(self, filename):
+        """Write the kept phases as a Chrome trace JSON file. Returns the event count."""
+        events = [
+            {"name": name, "ph": "X", "pid": 1, "tid": 0 if name == "frame" else 1,
+             "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000}
+            for name, start, end in self.trace
+        ]
+        folder = os.path.dirname(filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
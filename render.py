@@ -0,0 +1,319 @@
+import pygame
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from game_state import WINDOW_WIDTH, WINDOW_HEIGHT, MARIO_SIZE
+
+# --- Background Config ---
+BG_WIDTH = 500  # You can adjust this
+BG_HEIGHT = 600  # You can adjust this
+BG_SCALE = 1.7  # You can adjust this (1.0 = no scale, >1 = bigger)
+
+LINE_COLOR = (255, 255, 255)
+WEB_COLOR = (0, 255, 255)
+PREVIEW_COLOR = (0, 128, 255)
+HINT_COLOR = (255, 120, 200)
+DEBUG_COLOR = (255, 255, 255)
+NOTE_COLOR = (180, 220, 255)
+PAUSE_COLOR = (255, 255, 0)
+PROFILER_COLOR = (255, 220, 120)
+PROFILER_BG = (0, 0, 0, 170)
+
+DEBUG_X = 420
+DEBUG_Y = 10
+DEBUG_LINE_HEIGHT = 20
+
+MAX_VLINE_DEBUG = 8  # More VLINEs than this are shown as one VLINE_STATE line
+
+PROFILER_POS = (10, 10)
+PROFILER_REFRESH = 30  # Frames between overlay updates, so the numbers stay readable
+
+# --- User Notes (lower right, visually distinct, non-blocking) ---
+NOTES = [
+    "SPACE to speed up Mario.",
+    "Press P to pause the game.",
+    "Press K to save your spider-web layout.",
+    "Press L to load your saved spider-web map.",
+    "Press J to load the 3RD Round Map.",
+    "Press R to reset the game.",
+    "Press U to increase wonGames (for testing).",
+    "Press O for frame timings, T to save a trace.",
+    "Press F to fast-forward (10x, 50x, 100x).",
+    "Press H for web hints that lead Mario to the star.",
+]
+
+
+def debug_lines(state):
+    lines = [
+        f"SEC_ALIVE = {state.SEC_ALIVE:.2f}",
+        f"websAmount = {state.websAmount}",
+    ]
+    if len(state.VLINE_STATE) <= MAX_VLINE_DEBUG:
+        lines += [f"VLINE_{i + 1} = {on}" for i, on in enumerate(state.VLINE_STATE)]
+    else:
+        lines.append("VLINE_STATE = " + "".join(str(on) for on in state.VLINE_STATE))
+    lines += [
+        f"VLINE_STAR = {state.VLINE_STAR}",
+        f"onWeb = {1 if state.mario_sliding else 0}",
+        f"DIST_NEXT_WEB = {state.DIST_NEXT_WEB}",
+        f"VLINE_PIXELS_AWAY = {state.VLINE_PERCENTAGE} pixels",
+        f"ABOUT_TO_DIE = {state.ABOUT_TO_DIE}",
+        f"ABOUT_TO_WIN = {state.ABOUT_TO_WIN}",
+        f"TIME_TO_WIN = {state.TIME_TO_WIN if state.TIME_TO_WIN is not None else 0}",
+        f"TOTAL_TIME_TO_WIN = {state.TOTAL_TIME_TO_WIN:.2f}",
+        f"wonGames = {state.wonGames}",
+    ]
+    return lines
+
+
+class TextCache:
+    """Rendered text surfaces for one font and color, keyed by string (least recently used dropped first)."""
+
+    def __init__(self, font, color, max_size=512):
+        self.font = font
+        self.color = color
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+
+    def render(self, text):
+        surface = self._surfaces.get(text)
+        if surface is None:
+            surface = self.font.render(text, True, self.color)
+            self._surfaces[text] = surface
+            if len(self._surfaces) > self.max_size:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(text)
+        return surface
+
+
+class Renderer:
+    """
+    Draws a GameState onto the screen, redrawing only what changed.
+
+    Everything that stays put between frames (background, VLINEs, webs,
+    pipes and the notes) lives on one cached surface that is rebuilt only
+    when the webs or the star change. Each frame Mario, the web being
+    drawn and any debug line whose text changed are restored from that
+    surface, redrawn and passed to pygame.display.update as dirty rects.
+
+    On boards bigger than the window the camera follows Mario, and only
+    the VLINEs and webs inside the window are drawn (webs are looked up
+    through the WebIndex gap buckets). The static layer then follows the
+    camera, so it is rebuilt on frames where the view scrolls.
+
+    With hud=False the debug lines and notes are left out, and snap rounds
+    Mario's position down to a multiple of snap pixels (both for offscreen
+    renders that are scaled down).
+    """
+
+    def __init__(self, screen, sprite_mario, sprite_star, sprite_pipe, sprite_bg, profiler=None, hud=True,
+                 snap=1):
+        self.screen = screen
+        self.hud = hud
+        self.snap = snap
+        self.sprite_mario = sprite_mario
+        self.sprite_star = sprite_star
+        self.sprite_pipe = sprite_pipe
+        self.bg = pygame.transform.scale(sprite_bg, (int(BG_WIDTH * BG_SCALE), int(BG_HEIGHT * BG_SCALE))).convert()
+        self.bg_pos = (-int((BG_WIDTH * BG_SCALE - WINDOW_WIDTH) // 2), -int((BG_HEIGHT * BG_SCALE - WINDOW_HEIGHT) // 2))
+        self.static = pygame.Surface(screen.get_size()).convert()
+        self.static_key = None
+        self.camera = (0, 0)  # World position of the window's top-left corner
+        self.debug_text = TextCache(pygame.font.SysFont(None, 20), DEBUG_COLOR)
+        self.note_text = TextCache(pygame.font.SysFont(None, 20, bold=True), NOTE_COLOR)
+        self.pause_text = TextCache(pygame.font.SysFont(None, 80, bold=True), PAUSE_COLOR)
+        self.full_redraw = True
+        # What was on screen last frame: {item key: (rect, content)}
+        self.drawn = {}
+        self.drawn_text = set()  # Names in drawn that are HUD text
+        # Optional FrameProfiler: draw phases are timed and its overlay can be shown
+        self.profiler = profiler
+        self.show_profiler = False
+        self.profiler_font = pygame.font.SysFont("monospace", 14)
+        self.profiler_panel = None
+        self.profiler_age = 0
+
+    def _phase(self, name):
+        return self.profiler.phase(name) if self.profiler else nullcontext()
+
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        self.profiler_panel = None
+
+    def invalidate(self):
+        """Force the next frame to redraw the whole window."""
+        self.full_redraw = True
+
+    # --- Camera ---
+    def _update_camera(self, state):
+        width, height = self.screen.get_size()
+        x = state.mario_x + MARIO_SIZE // 2 - width // 2
+        y = state.mario_y + MARIO_SIZE // 2 - height // 2
+        self.camera = (int(min(max(0, x), max(0, state.board_width - width))),
+                       int(min(max(0, y), max(0, state.board_height - height))))
+
+    def to_world(self, pos):
+        """Board position under a window position (e.g. the mouse)."""
+        return pos[0] + self.camera[0], pos[1] + self.camera[1]
+
+    def _to_screen(self, point):
+        return point[0] - self.camera[0], point[1] - self.camera[1]
+
+    def _visible_webs(self, state):
+        """Webs that can show up in the window at the current camera."""
+        index = state.get_web_index()
+        cam_x, cam_y = self.camera
+        width, height = self.screen.get_size()
+        for w in index.irregular:
+            yield index.webs[w]
+        for g, ys in enumerate(index.gap_webs):
+            if index.lines_x[g + 1] < cam_x or index.lines_x[g] > cam_x + width:
+                continue
+            # Padded by the line width; a web's y range is at most gap_height below its lowest y
+            k = bisect_left(ys, (cam_y - index.gap_height[g] - 2, -1))
+            for low_y, w in ys[k:]:
+                if low_y > cam_y + height + 2:
+                    break
+                yield index.webs[w]
+
+    # --- Static layer ---
+    def _build_static(self, state):
+        surface = self.static
+        cam_x, cam_y = self.camera
+        width = surface.get_width()
+        with self._phase("background"):
+            surface.fill((0, 0, 0))
+            surface.blit(self.bg, self.bg_pos)
+        with self._phase("webs"):
+            for x in state.lines_x:
+                if cam_x - 2 <= x <= cam_x + width + 2:
+                    pygame.draw.line(surface, LINE_COLOR, (x - cam_x, -cam_y), (x - cam_x, state.board_height - cam_y), 2)
+            for start, end in self._visible_webs(state):
+                pygame.draw.line(surface, WEB_COLOR, self._to_screen(start), self._to_screen(end), 3)
+        with self._phase("sprites"):
+            for i, x in enumerate(state.lines_x):
+                rect = pygame.Rect(x - 10 - cam_x, state.pipe_y - cam_y, 20, 20)
+                # The star pipe gets the star, every other one is a piranha plant pipe
+                sprite = self.sprite_star if i == state.STAR_IDX else self.sprite_pipe
+                surface.blit(sprite, sprite.get_rect(center=rect.center))
+        if not self.hud:
+            return
+        with self._phase("text"):
+            note_y_start = DEBUG_Y + len(debug_lines(state)) * DEBUG_LINE_HEIGHT + 60  # Many lines below debug
+            for i, note in enumerate(NOTES):
+                note_render = self.note_text.render(note)
+                note_rect = note_render.get_rect(topright=(WINDOW_WIDTH - 10, note_y_start + i * 24))
+                surface.blit(note_render, note_rect)
+
+    def _profiler_panel(self):
+        """The overlay as one translucent surface, rebuilt every PROFILER_REFRESH frames."""
+        self.profiler_age -= 1
+        if self.profiler_panel is None or self.profiler_age <= 0:
+            renders = [self.profiler_font.render(line, True, PROFILER_COLOR) for line in self.profiler.overlay_lines()]
+            height = self.profiler_font.get_linesize()
+            panel = pygame.Surface((max(r.get_width() for r in renders) + 8, len(renders) * height + 8), pygame.SRCALPHA)
+            panel.fill(PROFILER_BG)
+            for i, render in enumerate(renders):
+                panel.blit(render, (4, 4 + i * height))
+            self.profiler_panel = panel
+            self.profiler_age = PROFILER_REFRESH
+        return self.profiler_panel
+
+    def _static_key(self, state):
+        return (id(state.webs), len(state.webs), state.STAR_IDX, tuple(state.lines_x), self.camera)
+
+    # --- Frame ---
+    def draw(self, state, preview=None, hint=None):
+        """
+        Draw one frame. preview is the (start, end) of a web being drawn, if
+        any; hint is a list of suggested (start, end) webs. Returns the rects
+        where the board (Mario, webs, preview, hints) changed, empty when only
+        HUD text or nothing changed since the last frame.
+        """
+        self._update_camera(state)
+        key = self._static_key(state)
+        if key != self.static_key:
+            self._build_static(state)
+            self.static_key = key
+            self.full_redraw = True
+
+        # Every dynamic item as key -> (rect, content, draw function, profiler phase)
+        items = {}
+        if preview is not None:
+            preview = (self._to_screen(preview[0]), self._to_screen(preview[1]))
+            (x1, y1), (x2, y2) = preview
+            rect = pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1).inflate(4, 4)
+            items["preview"] = (rect, preview,
+                                lambda: pygame.draw.line(self.screen, PREVIEW_COLOR, preview[0], preview[1], 2), "webs")
+        for i, (start, end) in enumerate(hint or ()):
+            start, end = self._to_screen(start), self._to_screen(end)
+            (x1, y1), (x2, y2) = start, end
+            rect = pygame.Rect(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1).inflate(4, 4)
+            items[("hint", i)] = (rect, (start, end),
+                                  lambda start=start, end=end: pygame.draw.line(self.screen, HINT_COLOR, start, end, 2),
+                                  "webs")
+        # Padded a pixel so float positions never leave a sliver behind
+        mario_pos = tuple(int(v) // self.snap * self.snap for v in self._to_screen((state.mario_x, state.mario_y)))
+        mario_rect = self.sprite_mario.get_rect(topleft=mario_pos).inflate(2, 2)
+        items["mario"] = (mario_rect, mario_pos,
+                          lambda: self.screen.blit(self.sprite_mario, mario_pos), "sprites")
+        with self._phase("text"):
+            for i, txt in enumerate(debug_lines(state) if self.hud else ()):
+                render = self.debug_text.render(txt)
+                pos = (DEBUG_X, DEBUG_Y + i * DEBUG_LINE_HEIGHT)
+                items[("debug", i)] = (render.get_rect(topleft=pos), txt,
+                                       lambda render=render, pos=pos: self.screen.blit(render, pos), "text")
+            if self.show_profiler and self.profiler:
+                panel = self._profiler_panel()
+                items["profiler"] = (panel.get_rect(topleft=PROFILER_POS), id(panel),
+                                     lambda: self.screen.blit(panel, PROFILER_POS), "text")
+
+        if self.full_redraw:
+            with self._phase("background"):
+                self.screen.blit(self.static, (0, 0))
+            for rect, content, draw, phase in items.values():
+                with self._phase(phase):
+                    draw()
+            with self._phase("flip"):
+                pygame.display.update()
+            self.full_redraw = False
+            changed = [self.screen.get_rect()]
+        else:
+            dirty = []
+            changed = []  # The part of dirty that is not HUD text
+            for name, (rect, content, draw, phase) in items.items():
+                old = self.drawn.get(name)
+                if old is None or old != (rect, content):
+                    rects = [rect] if old is None else [rect, old[0]]
+                    dirty.extend(rects)
+                    if phase != "text":
+                        changed.extend(rects)
+            for name, (rect, content) in self.drawn.items():
+                if name not in items:
+                    dirty.append(rect)
+                    if name not in self.drawn_text:
+                        changed.append(rect)
+            with self._phase("background"):
+                for rect in dirty:
+                    self.screen.blit(self.static, rect, rect)
+            if dirty:
+                for rect, content, draw, phase in items.values():
+                    if rect.collidelist(dirty) != -1:
+                        with self._phase(phase):
+                            draw()
+            with self._phase("flip"):
+                pygame.display.update(dirty)
+        self.drawn = {name: (rect, content) for name, (rect, content, draw, phase) in items.items()}
+        self.drawn_text = {name for name, (rect, content, draw, phase) in items.items() if phase == "text"}
+        return changed
+
+    def draw_paused(self):
+        pause_text = self.pause_text.render("PAUSED")
+        pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        self.screen.blit(pause_text, pause_rect)
+        with self._phase("flip"):
+            pygame.display.update(pause_rect)
+        # The banner is not part of the static layer, so clear it properly on resume
+        self.full_redraw = True
@@ -0,0 +1,235 @@
+import json
+import struct
+import zlib
+
+from game_state import GameState, LINE_COUNT, MARIO_SIZE, WINDOW_HEIGHT
+from levels import LevelPack
+
+# --- File format ---
+# Header: MAGIC, u8 version, u64 session seed.
+# A BOARD record (tick 0) follows when the board is not the default size,
+# then LADDER records (tick 0) holding the round progression. LADDER
+# records again later mean the maps were reloaded from disk (R key).
+# Then records, each: u8 payload length, u8 type, u32 tick, payload.
+# tick is GameState.ticks when the input was applied, i.e. the number of
+# step() calls made before it, so paused input replays on the right frame.
+MAGIC = b"MSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQ")
+RECORD = struct.Struct("<BBI")
+
+ROUND = 1  # u32 round seed, u8 VLINE_STAR, u8 start VLINE (checked on replay)
+WEB = 2  # 4 x i16: start x, start y, end x, end y
+SPEED = 3  # u8 1 = SPACE held, 0 = released
+NEW_GAME = 4  # R key
+LOAD_WEBS = 5  # u8 keep_webs, u16 count, count x 4 x i16 (map stored inline)
+WON_BUMP = 6  # U key
+END = 7  # last tick of the session
+BOARD = 8  # u16 VLINE count, u16 board height
+LADDER = 9  # Chunks of zlib JSON LevelPack.record(); consecutive records are joined
+
+WEB_STRUCT = struct.Struct("<4h")
+ROUND_STRUCT = struct.Struct("<IBB")
+LOAD_STRUCT = struct.Struct("<BH")
+BOARD_STRUCT = struct.Struct("<HH")
+
+
+class ReplayError(Exception):
+    pass
+
+
+class Recorder:
+    """
+    Plays input into a GameState and logs it to a compact binary file.
+
+    Use it in place of calling the state directly: step(), apply_actions(),
+    new_game(), load_webs() and bump_won(). Only input is stored (about 10 bytes per web
+    or SPACE press), never per-frame state.
+    """
+
+    def __init__(self, state, filename, seed):
+        self.state = state
+        self.f = open(filename, "wb")
+        self.f.write(HEADER.pack(MAGIC, VERSION, seed))
+        if (state.line_count, state.board_height) != (LINE_COUNT, WINDOW_HEIGHT):
+            self._write(BOARD, BOARD_STRUCT.pack(state.line_count, state.board_height))
+        # The ladder (with its maps inline) decides maps, speed and stars, so replays must not depend on ladder.json
+        self._ladder()
+        self._round()
+
+    def _ladder(self):
+        ladder = zlib.compress(json.dumps(self.state.levels.record()).encode())
+        for i in range(0, len(ladder), 255):
+            self._write(LADDER, ladder[i:i + 255])
+
+    def _write(self, kind, payload=b""):
+        self.f.write(RECORD.pack(len(payload), kind, self.state.ticks) + payload)
+
+    def _round(self):
+        state = self.state
+        self._seen_round = state.rounds
+        start = state.lines_x.index(state.mario_x + MARIO_SIZE // 2)
+        self._write(ROUND, ROUND_STRUCT.pack(state.round_seed, state.VLINE_STAR, start))
+
+    def _check_round(self):
+        if self.state.rounds != self._seen_round:
+            self._round()
+
+    # --- Input ---
+    def step(self, actions=()):
+        events = self.apply_actions(actions)
+        events += self.state.step()
+        self._check_round()
+        return events
+
+    def apply_actions(self, actions):
+        for action in actions:
+            if action[0] == "web":
+                (x1, y1), (x2, y2) = action[1], action[2]
+                self._write(WEB, WEB_STRUCT.pack(x1, y1, x2, y2))
+            elif action[0] == "speed":
+                self._write(SPEED, bytes([1 if action[1] else 0]))
+        return self.state.apply_actions(actions)
+
+    def new_game(self):
+        self._write(NEW_GAME)
+        self.state.new_game()
+        self._check_round()
+
+    def load_webs(self, webs, keep_webs=True):
+        """Replace the webs and start a new round, like the L and J keys."""
+        # Maps longer than one record are split: the first chunk replaces the
+        # webs, and chunks flagged 2 append to it
+        per_record = (255 - LOAD_STRUCT.size) // WEB_STRUCT.size
+        for i in range(0, max(len(webs), 1), per_record):
+            chunk = webs[i:i + per_record]
+            flag = (1 if keep_webs else 0) if i == 0 else 2
+            payload = LOAD_STRUCT.pack(flag, len(chunk))
+            payload += b"".join(WEB_STRUCT.pack(x1, y1, x2, y2) for (x1, y1), (x2, y2) in chunk)
+            self._write(LOAD_WEBS, payload)
+        self.state.set_webs(webs)
+        self.state.reset_game(keep_webs)
+        self._check_round()
+
+    def reload_levels(self):
+        """Re-read the ladder's maps from disk (e.g. after fixing one), recording what was read."""
+        self.state.levels.reload()
+        self._ladder()
+
+    def bump_won(self):
+        self._write(WON_BUMP)
+        self.state.wonGames += 1
+
+    def close(self):
+        if not self.f.closed:
+            self._write(END)
+            self.f.close()
+
+
+def read_replay(filename):
+    """Return (seed, [(kind, tick, payload bytes), ...]) from a replay file."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ReplayError(f"{filename} is too short to be a replay")
+    magic, version, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"{filename} is not a version {VERSION} replay")
+    records = []
+    pos = HEADER.size
+    while pos + RECORD.size <= len(data):
+        length, kind, tick = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        records.append((kind, tick, data[pos:pos + length]))
+        pos += length
+    return seed, records
+
+
+def _ladder_levels(filename, payload):
+    try:
+        # Back-to-back reloads leave several zlib streams in one run; the last one counts
+        while True:
+            stream = zlib.decompressobj()
+            data = stream.decompress(payload)
+            if not stream.unused_data:
+                break
+            payload = stream.unused_data
+        return LevelPack(**json.loads(data))
+    except Exception as e:
+        raise ReplayError(f"{filename} has a broken ladder: {e}")
+
+
+def play_replay(filename, on_events=None, on_step=None):
+    """
+    Re-simulate a recorded session headlessly, as fast as possible.
+
+    on_events(tick, events) is called for every step that produced events,
+    on_step(state) after every step (e.g. to draw the frame).
+    Returns the final GameState. Raises ReplayError if a round starts
+    differently from the recording.
+    """
+    seed, records = read_replay(filename)
+    line_count, board_height = LINE_COUNT, WINDOW_HEIGHT
+    if records and records[0][0] == BOARD:
+        line_count, board_height = BOARD_STRUCT.unpack(records[0][2])
+    # Join each run of LADDER records into one
+    joined = []
+    for kind, tick, payload in records:
+        if kind == LADDER and joined and joined[-1][0] == LADDER:
+            joined[-1] = (LADDER, joined[-1][1], joined[-1][2] + payload)
+        else:
+            joined.append((kind, tick, payload))
+    records = joined
+    first = next((i for i, record in enumerate(records) if record[0] not in (BOARD, LADDER)), len(records))
+    initial = [payload for kind, tick, payload in records[:first] if kind == LADDER]
+    # Replays recorded before ladders get the default progression
+    levels = _ladder_levels(filename, initial[0]) if initial else LevelPack()
+    state = GameState(seed=seed, line_count=line_count, board_height=board_height, levels=levels)
+    pending_webs = None
+    pending_keep = False
+
+    def finish_load():
+        state.set_webs(pending_webs)
+        state.reset_game(pending_keep)
+
+    for i, (kind, tick, payload) in enumerate(records):
+        if pending_webs is not None and not (kind == LOAD_WEBS and payload[0] == 2):
+            finish_load()
+            pending_webs = None
+        while state.ticks < tick:
+            events = state.step()
+            if events and on_events:
+                on_events(state.ticks, events)
+            if on_step:
+                on_step(state)
+        if kind == ROUND:
+            round_seed, star, start = ROUND_STRUCT.unpack(payload)
+            if (state.round_seed, state.VLINE_STAR, state.lines_x[start] - MARIO_SIZE // 2) != (round_seed, star, state.mario_x):
+                raise ReplayError(f"replay diverged at tick {tick}: round {state.rounds} does not match")
+        elif kind == WEB:
+            x1, y1, x2, y2 = WEB_STRUCT.unpack(payload)
+            events = state.apply_actions([("web", (x1, y1), (x2, y2))])
+            if events and on_events:
+                on_events(tick, events)
+        elif kind == SPEED:
+            state.apply_actions([("speed", bool(payload[0]))])
+        elif kind == NEW_GAME:
+            state.new_game()
+        elif kind == LOAD_WEBS:
+            flag, count = LOAD_STRUCT.unpack_from(payload)
+            webs = [WEB_STRUCT.unpack_from(payload, LOAD_STRUCT.size + j * WEB_STRUCT.size) for j in range(count)]
+            webs = [((x1, y1), (x2, y2)) for x1, y1, x2, y2 in webs]
+            if flag == 2:
+                pending_webs.extend(webs)
+            else:
+                pending_webs = webs
+                pending_keep = bool(flag)
+        elif kind == WON_BUMP:
+            state.wonGames += 1
+        elif kind == LADDER and i > first:
+            state.levels = _ladder_levels(filename, payload)  # Maps reloaded from disk
+        elif kind == END:
+            break
+    if pending_webs is not None:
+        finish_load()
+    return state
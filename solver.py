@@ -0,0 +1,254 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from game_state import GameState, LINE_COUNT, MARIO_SIZE, MARIO_SPEED_DEFAULT, PIPE_Y, make_lines_x
+from web_index import WebIndex, far_endpoint, hop_distance, web_id
+
+# pipe: 0-based VLINE Mario reached the pipes on (None if the round never ends)
+# path: indices into webs, in the order Mario rode them
+# frames: frame on which the round ended, i.e. TIME_TO_WIN * FPS for a win
+RoundResult = namedtuple("RoundResult", ["pipe", "won", "path", "frames"])
+
+HALF = MARIO_SIZE // 2
+DEATH_Y = PIPE_Y - MARIO_SIZE  # mario_y that triggers the pipe check
+WIN_Y = PIPE_Y - 5  # mario_y the star pipe needs to pass
+
+_fall_cache = {}
+
+
+def fall_sequence(y0, speed):
+    """
+    mario_y on each frame of a straight fall from y0, accumulated exactly the
+    way the frame loop adds MARIO_SPEED (so thresholds land on the same frame).
+    """
+    key = (y0, speed)
+    seq = _fall_cache.get(key)
+    if seq is None:
+        seq = [y0]
+        y = y0
+        while y <= WIN_Y:
+            y += speed
+            seq.append(y)
+        if len(_fall_cache) > 50000:
+            _fall_cache.clear()
+        _fall_cache[key] = seq
+    return seq
+
+
+def resolve_round(webs, start_idx, star_idx, speed=MARIO_SPEED_DEFAULT, line_count=LINE_COUNT, max_frames=100000):
+    """
+    Work out where Mario ends up by jumping from web to web instead of
+    stepping every frame. start_idx and star_idx are 0-based VLINEs.
+
+    Gives the same answer as GameState.step for maps drawn in the game.
+    Maps holding webs that do not join two adjacent VLINEs are handed to
+    the frame-stepped engine instead.
+    """
+    lines_x = make_lines_x(line_count)
+    webs = [(tuple(start), tuple(end)) for start, end in webs]
+    index = WebIndex(webs, lines_x)
+    if index.irregular:
+        return step_round(webs, start_idx, star_idx, speed, line_count, max_frames)
+    return resolve_from(index, start_idx, 0, star_idx, speed, max_frames=max_frames)
+
+
+def resolve_from(index, line, mario_y, star_idx, speed=MARIO_SPEED_DEFAULT, used=(), extra=(), max_frames=100000,
+                 trace=None):
+    """
+    resolve_round from Mario falling down `line` at mario_y, having used
+    the web ids in `used`, over a WebIndex with no irregular webs.
+
+    extra holds a few more webs treated as if appended to index.webs
+    (path indices continue after the indexed ones), so candidate boards
+    can be tried without re-indexing. If trace is a list, every fall is
+    appended to it as (line, mario_y at the start, mario_y at its end).
+    frames count from the given position.
+    """
+    lines_x = index.lines_x
+    webs = index.webs
+    extra_ids = [web_id(start, end) for start, end in extra]
+    radius = speed + MARIO_SIZE / 4
+    frame = 0
+    used = set(used)
+    path = []
+    # Falls that began with no used webs; reaching one again means Mario loops forever
+    seen = set()
+    while frame < max_frames:
+        # --- Fall down `line` from mario_y until a hop or the pipes ---
+        x = lines_x[line]
+        seq = fall_sequence(mario_y, speed)
+        if line == star_idx:
+            end = bisect_right(seq, WIN_Y, 1)
+        else:
+            end = bisect_left(seq, DEATH_Y, 1)
+        if seq[0] <= 0:
+            used.clear()
+        if not used:
+            if (line, mario_y) in seen:
+                return RoundResult(None, False, path, max_frames)
+            seen.add((line, mario_y))
+        hop = _first_hop(index, line, seq, end, radius, used, extra, extra_ids)
+        if hop is None:
+            if trace is not None:
+                trace.append((line, mario_y, seq[end - 1]))
+            return RoundResult(line, line == star_idx, path, frame + end)
+        k, w = hop
+        if trace is not None:
+            trace.append((line, mario_y, seq[k]))
+        frame += k + 1
+        cy = seq[k] + HALF
+        if w < len(webs):
+            used.add(index.ids[w])
+            start, stop = webs[w]
+        else:
+            used.add(extra_ids[w - len(webs)])
+            start, stop = extra[w - len(webs)]
+        path.append(w)
+        target = far_endpoint(start, stop, x, cy)
+
+        # --- Slide to the far endpoint ---
+        start = (x - HALF, seq[k])
+        goal = (target[0] - HALF, target[1] - HALF)
+        frames, pipe, won, cleared = _slide(start, goal, speed, star_idx, lines_x)
+        if pipe is not None:
+            return RoundResult(pipe, won, path, frame + frames)
+        frame += frames
+        if cleared:
+            used.clear()
+        line = lines_x.index(target[0])
+        mario_y = goal[1]
+    return RoundResult(None, False, path, frame)
+
+
+def _first_hop(index, line, seq, end, radius, used, extra=(), extra_ids=()):
+    """Earliest (fall frame, web index) Mario hops on during a fall, ties going to list order."""
+    x = index.lines_x[line]
+    ys = index.line_webs[line]
+    # Hops are only tested while some web on this line is still below Mario
+    lowest = ys[-1][0] if ys else -math.inf
+    for start, stop in extra:
+        for point in (start, stop):
+            if point[0] == x and point[1] > lowest:
+                lowest = point[1]
+    if lowest == -math.inf:
+        return None
+    best = None
+    base = len(index.webs)
+    for j, (start, stop) in enumerate(extra):
+        if extra_ids[j] in used or not (start[0] == x or stop[0] == x):
+            continue
+        # Extra webs always join two adjacent VLINEs, so the same bound applies
+        y = start[1] if start[0] == x else stop[1]
+        reach = math.hypot(stop[0] - start[0], stop[1] - start[1]) / abs(stop[0] - start[0])
+        span = radius * reach + 1
+        k = max(0, bisect_left(seq, y - HALF - span, 0, end))
+        while k < end and (best is None or k < best[0]):
+            cy = seq[k] + HALF
+            if cy > y + span or cy >= lowest:
+                break
+            distance = hop_distance(start, stop, x, cy)
+            if distance is not None and distance < radius:
+                best = (k, base + j)
+                break
+            k += 1
+    if not ys:
+        return best
+    span = radius * index.line_reach[line] + 1
+    top = seq[0] + HALF - span
+    bottom = seq[end - 1] + HALF + span
+    for y, w in ys[bisect_left(ys, (top, -1)):bisect_right(ys, (bottom, math.inf))]:
+        if index.ids[w] in used:
+            continue
+        start, stop = index.webs[w]
+        k = max(0, bisect_left(seq, y - HALF - span, 0, end))
+        while k < end and (best is None or k <= best[0]):
+            cy = seq[k] + HALF
+            if cy > y + span or cy >= lowest:
+                break
+            distance = hop_distance(start, stop, x, cy)
+            if distance is not None and distance < radius:
+                if best is None or (k, w) < best:
+                    best = (k, w)
+                break
+            k += 1
+    return best
+
+
+def _slide(start, goal, speed, star_idx, lines_x):
+    """
+    Frames a slide takes (counting the arrival frame), the pipe and win flag
+    if the round ends on the way, and whether mario_y touched 0 (which
+    clears used webs).
+    """
+    distance = math.hypot(goal[0] - start[0], goal[1] - start[1])
+    moves = distance / speed
+    risky = (
+        abs(moves - round(moves)) < 1e-6
+        or min(start[1], goal[1]) <= 0
+        or max(start[1], goal[1]) + MARIO_SIZE >= PIPE_Y
+    )
+    if not risky:
+        return max(0, math.ceil(moves - 1)) + 1, None, False, False
+    # Close to a rounding edge, the top of the screen or the pipes: step it exactly
+    mario_x, mario_y = start
+    cleared = False
+    frames = 0
+    while True:
+        frames += 1
+        center_x = mario_x + HALF
+        if mario_y <= 0:
+            cleared = True
+        dx = goal[0] - mario_x
+        dy = goal[1] - mario_y
+        dist = math.hypot(dx, dy)
+        arrived = dist <= speed
+        if arrived:
+            mario_x, mario_y = goal
+        else:
+            mario_x += speed * (dx / dist)
+            mario_y += speed * (dy / dist)
+        if mario_y + MARIO_SIZE >= PIPE_Y:
+            star_x = lines_x[star_idx]
+            if abs(center_x - star_x) < 5:
+                if PIPE_Y - mario_y < 5:
+                    return frames, star_idx, True, cleared
+            else:
+                pipe = min(range(len(lines_x)), key=lambda i: abs(center_x - lines_x[i]))
+                return frames, pipe, False, cleared
+        if arrived:
+            return frames, None, False, cleared
+
+
+# --- Frame-stepped reference ---
+def step_round(webs, start_idx, star_idx, speed=MARIO_SPEED_DEFAULT, line_count=LINE_COUNT, max_frames=100000):
+    """Play the same round through GameState.step, frame by frame."""
+    state = GameState(seed=0, line_count=line_count)
+    state.set_webs(webs)
+    state.VLINE_STAR = star_idx + 1
+    state.STAR_IDX = star_idx
+    state.mario_x = state.lines_x[start_idx] - HALF
+    state.MARIO_SPEED = speed
+    path = []
+    for frame in range(1, max_frames + 1):
+        used_before = state.used_mask
+        center_x = state.mario_x + HALF
+        events = state.step()
+        new = state.used_mask & ~used_before
+        if new:
+            # Bits are slots, the first web with each id
+            path.append(new.bit_length() - 1)
+        if "win" in events or "death" in events:
+            pipe = min(range(line_count), key=lambda i: abs(center_x - state.lines_x[i]))
+            return RoundResult(pipe, "win" in events, path, frame)
+    return RoundResult(None, False, path, max_frames)
+
+
+def cross_check(webs, start_idx, star_idx, speed=MARIO_SPEED_DEFAULT, line_count=LINE_COUNT, max_frames=100000):
+    """Solve a round both ways; returns (analytic, stepped, agree)."""
+    fast = resolve_round(webs, start_idx, star_idx, speed, line_count, max_frames)
+    slow = step_round(webs, start_idx, star_idx, speed, line_count, max_frames)
+    if fast.pipe is None or slow.pipe is None:
+        # A round that never ends is only compared on that fact
+        return fast, slow, fast.pipe == slow.pipe
+    return fast, slow, fast == slow
@@ -0,0 +1,283 @@
+import heapq
+import math
+from bisect import bisect_left, bisect_right, insort
+
+
+def ccw(A, B, C):
+    return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
+
+
+def segments_intersect(A, B, C, D):
+    return (ccw(A, C, D) != ccw(B, C, D)) and (ccw(A, B, C) != ccw(A, B, D))
+
+
+def find_conflicts(webs, lines_x):
+    """Every pair (i, j), i < j, of webs that segments_intersect says cross (see WebIndex.conflicts)."""
+    return WebIndex(list(webs), lines_x).conflicts()
+
+
+def web_id(start, end):
+    return tuple(sorted([start, end]))
+
+
+def hop_distance(start, end, cx, cy):
+    """Distance from Mario's center to a web, or None if the web is out of his column."""
+    x1, y1 = start
+    x2, y2 = end
+    if min(x1, x2) - 1 <= cx <= max(x1, x2) + 1:
+        dx, dy = x2 - x1, y2 - y1
+        if dx == dy == 0:
+            return None
+        t = max(0, min(1, ((cx - x1) * dx + (cy - y1) * dy) / (dx * dx + dy * dy)))
+        px, py = x1 + t * dx, y1 + t * dy
+        return math.hypot(cx - px, cy - py)
+    return None
+
+
+def crosses_fall(start, end, cx, y0, y1):
+    """Whether a web crosses the straight fall of Mario's center from (cx, y0) down to (cx, y1)."""
+    if start == end:
+        return False  # A point web is never hopped on, as in hop_distance
+    (x1, ya), (x2, yb) = start, end
+    if not min(x1, x2) <= cx <= max(x1, x2):
+        return False
+    if x1 == x2:
+        return min(ya, yb) <= y1 and max(ya, yb) >= y0  # vertical web
+    web_y = ya + (cx - x1) / (x2 - x1) * (yb - ya)
+    return y0 <= web_y <= y1
+
+
+def far_endpoint(start, end, cx, cy):
+    """Always slide to the endpoint that is NOT closest to Mario's current position."""
+    if math.hypot(cx - start[0], cy - start[1]) < math.hypot(cx - end[0], cy - end[1]):
+        return end
+    return start
+
+
+class WebIndex:
+    """
+    Lookup tables over a web list so a frame never has to scan every web.
+
+    Webs joining two adjacent VLINEs are bucketed by gap (the index of their
+    left VLINE) and, for each VLINE they touch, kept sorted by the y where
+    they meet it. Anything else a hand-edited map might contain (vertical or
+    off-line webs) goes into `irregular` and is still scanned every query,
+    so results always match a full scan of `webs` in list order.
+
+    Webs with the same endpoints count as one web once used, so each web
+    also gets a slot: the index of the first web with its id. A set of
+    used webs is an int with bit `slot` set for each, e.g. GameState.used_mask.
+    """
+
+    def __init__(self, webs, lines_x):
+        self.webs = webs
+        self.lines_x = lines_x
+        self._line_of = {x: i for i, x in enumerate(lines_x)}
+        self.ids = []
+        self.slots = []
+        self._slot_of = {}
+        self.gaps = [[] for _ in range(len(lines_x) - 1)]
+        # Per gap: sorted (lowest y, web index) and the tallest web, so a
+        # query between two VLINEs only walks webs near Mario's y.
+        self.gap_webs = [[] for _ in range(len(lines_x) - 1)]
+        self.gap_height = [0] * (len(lines_x) - 1)
+        self.irregular = []
+        # Per VLINE: sorted (y, web index) where a web meets the line, plus
+        # the longest web / |dx| ratio there, used to bound the hop search.
+        self.line_webs = [[] for _ in lines_x]
+        self.line_reach = [1.0] * len(lines_x)
+        # Highest start y over webs touching each VLINE (the star column rule)
+        self.max_start_y = [-1] * len(lines_x)
+        self.count = 0
+        for start, end in webs:
+            self._add(start, end)
+
+    def sync(self):
+        """Index any webs appended since the last call."""
+        for start, end in self.webs[self.count:]:
+            self._add(start, end)
+
+    def fork(self, webs):
+        """
+        A copy of this index for `webs`, a new list that starts with the
+        webs indexed so far. Nothing mutable is shared, so either index can
+        sync() on its own list; cheaper than indexing webs from scratch.
+        """
+        index = WebIndex.__new__(WebIndex)
+        index.webs = webs
+        index.lines_x = self.lines_x
+        index._line_of = self._line_of
+        index.ids = self.ids[:]
+        index.slots = self.slots[:]
+        index._slot_of = dict(self._slot_of)
+        index.gaps = [bucket[:] for bucket in self.gaps]
+        index.gap_webs = [ys[:] for ys in self.gap_webs]
+        index.gap_height = self.gap_height[:]
+        index.irregular = self.irregular[:]
+        index.line_webs = [ys[:] for ys in self.line_webs]
+        index.line_reach = self.line_reach[:]
+        index.max_start_y = self.max_start_y[:]
+        index.count = self.count
+        return index
+
+    def _add(self, start, end):
+        w = self.count
+        self.count += 1
+        wid = web_id(start, end)
+        self.ids.append(wid)
+        self.slots.append(self._slot_of.setdefault(wid, w))
+        for point in (start, end):
+            i = self._line_of.get(point[0])
+            if i is not None and start[1] > self.max_start_y[i]:
+                self.max_start_y[i] = start[1]
+        i1 = self._line_of.get(start[0])
+        i2 = self._line_of.get(end[0])
+        if i1 is None or i2 is None or abs(i1 - i2) != 1:
+            self.irregular.append(w)
+            return
+        gap = min(i1, i2)
+        self.gaps[gap].append(w)
+        insort(self.gap_webs[gap], (min(start[1], end[1]), w))
+        self.gap_height[gap] = max(self.gap_height[gap], abs(end[1] - start[1]))
+        dx = end[0] - start[0]
+        reach = math.hypot(dx, end[1] - start[1]) / abs(dx)
+        for i, point in ((i1, start), (i2, end)):
+            insort(self.line_webs[i], (point[1], w))
+            if reach > self.line_reach[i]:
+                self.line_reach[i] = reach
+
+    def _gaps_near(self, cx, pad):
+        """Gaps whose x-range (widened by pad) contains cx."""
+        lo = bisect_left(self.lines_x, cx - pad)
+        hi = bisect_right(self.lines_x, cx + pad)
+        return range(max(0, lo - 1), min(len(self.gaps), hi))
+
+    def _candidates(self, cx, pad):
+        """Web indices whose x-range (widened by pad) could contain cx, in no particular order."""
+        found = list(self.irregular)
+        for g in self._gaps_near(cx, pad):
+            found.extend(self.gaps[g])
+        return found
+
+    # --- Queries ---
+    def next_web_dist(self, cx, cy):
+        """Distance from (cx, cy) down to the nearest web under Mario's x, or None."""
+        best = None
+        line = self._line_of.get(cx)
+        if line is not None:
+            # On a VLINE the web's y at cx is just its endpoint y on that line
+            ys = self.line_webs[line]
+            k = bisect_right(ys, (cy, math.inf))
+            if k < len(ys):
+                best = ys[k][0] - cy
+        else:
+            for g in self._gaps_near(cx, 0):
+                ys = self.gap_webs[g]
+                # A web's y anywhere in the gap is at least its lowest y
+                k = bisect_left(ys, (cy - self.gap_height[g], -1))
+                for low_y, w in ys[k:]:
+                    if best is not None and low_y - cy >= best:
+                        break
+                    best = self._closer_below(w, cx, cy, best)
+        for w in self.irregular:
+            best = self._closer_below(w, cx, cy, best)
+        return best
+
+    def _closer_below(self, w, cx, cy, best):
+        (x1, y1), (x2, y2) = self.webs[w]
+        if min(x1, x2) <= cx <= max(x1, x2):
+            if x1 != x2:
+                t = (cx - x1) / (x2 - x1)
+                web_y = y1 + t * (y2 - y1)
+            else:
+                web_y = y1  # vertical web
+            if web_y > cy and (best is None or web_y - cy < best):
+                return web_y - cy
+        return best
+
+    def find_hop(self, cx, cy, radius, used=0, from_y=None):
+        """
+        First web (in list order) Mario's center is within radius of and has
+        not used yet (used is a bitmask over slots). Returns (web index, far
+        endpoint) or None.
+
+        from_y is where Mario's center was on the last tick if he fell
+        straight down since; any web crossing that fall also counts, so no
+        speed can carry him through a web between two ticks. While radius
+        is larger than the fall step (always true for MARIO_SPEED +
+        MARIO_SIZE / 4) such a web is within radius anyway, so the sweep
+        never changes which web is picked.
+        """
+        line = self._line_of.get(cx)
+        if line is not None:
+            # A web meeting the line at y is at least |cy - y| / reach away from (cx, cy)
+            span = radius * self.line_reach[line] + 1
+            ys = self.line_webs[line]
+            lo = bisect_left(ys, (min(cy, from_y if from_y is not None else cy) - span, -1))
+            hi = bisect_right(ys, (cy + span, math.inf))
+            candidates = [w for _, w in ys[lo:hi]] + self.irregular
+        else:
+            candidates = self._candidates(cx, 1)
+        for w in sorted(candidates):
+            start, end = self.webs[w]
+            if used >> self.slots[w] & 1:
+                continue
+            distance = hop_distance(start, end, cx, cy)
+            # --- Symmetric web detection: allow hopping from either endpoint ---
+            if (distance is not None and distance < radius) or (from_y is not None and crosses_fall(start, end, cx, from_y, cy)):
+                return w, far_endpoint(start, end, cx, cy)
+        return None
+
+    # --- Placement checks ---
+    def crossing(self, start, end):
+        """
+        Index of a web that start-end crosses per segments_intersect, or None
+        (the place_web overlap check). Webs that cross share a point, so
+        only irregular webs and webs in the same or a neighbouring gap whose
+        y-range reaches the new web's are tested.
+        """
+        i1 = self._line_of.get(start[0])
+        i2 = self._line_of.get(end[0])
+        if i1 is None or i2 is None or abs(i1 - i2) != 1:
+            candidates = range(self.count)
+        else:
+            candidates = list(self.irregular)
+            low, high = min(start[1], end[1]), max(start[1], end[1])
+            gap = min(i1, i2)
+            for g in range(max(0, gap - 1), min(len(self.gaps), gap + 2)):
+                ys = self.gap_webs[g]
+                for low_y, w in ys[bisect_left(ys, (low - self.gap_height[g], -1)):]:
+                    if low_y > high:
+                        break
+                    candidates.append(w)
+        for w in candidates:
+            if segments_intersect(start, end, *self.webs[w]):
+                return w
+        return None
+
+    def conflicts(self):
+        """
+        Every pair (i, j), i < j, of indexed webs that cross per
+        segments_intersect, sorted. Each gap is swept by lowest y together
+        with the next one, only comparing webs whose y-ranges overlap, so a
+        map of n webs takes O(n log n) plus the overlapping pairs.
+        """
+        webs = self.webs
+        pairs = set()
+        for g, ys in enumerate(self.gap_webs):
+            nxt = self.gap_webs[g + 1] if g + 1 < len(self.gap_webs) else []
+            active = []  # (highest y, web index, in gap g + 1) of webs still overlapping the sweep
+            for low_y, w, right in heapq.merge(((y, w, False) for y, w in ys), ((y, w, True) for y, w in nxt)):
+                while active and active[0][0] < low_y:
+                    heapq.heappop(active)
+                start, end = webs[w]
+                for _, v, other in active:
+                    # Pairs inside gap g + 1 come up in its own sweep
+                    if not (right and other) and segments_intersect(start, end, *webs[v]):
+                        pairs.add((min(v, w), max(v, w)))
+                heapq.heappush(active, (max(start[1], end[1]), w, right))
+        for w in self.irregular:
+            for v in range(self.count):
+                if v != w and segments_intersect(webs[w][0], webs[w][1], *webs[v]):
+                    pairs.add((min(v, w), max(v, w)))
+        return sorted(pairs)